@@ -1,19 +1,109 @@
-from pdf2imgbe.lib.log import logger
+from pdf2imgbe.lib.log import logger, request_id_var, conversion_id_var
 
 import os
-import re
+import json
+import asyncio
 import base64
-import uvicorn
+import random
+import shutil
+import hashlib
 import typing as T
 from uuid import uuid4
 from http import HTTPStatus
-from datetime import datetime
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, UploadFile, File, Form, HTTPException
+from fastapi.responses import FileResponse, Response
+from starlette.routing import Match
+
+from pdf2imgbe.services.db import SQLClient, canonical_uuid
+from pdf2imgbe.services.scheduler import ConversionScheduler
+from pdf2imgbe.lib.cache import TTLCache
+from pdf2imgbe.lib.exception import ProcessException
+from pdf2imgbe.lib.preflight import preflight_pdf
+from pdf2imgbe.lib.pdf_converter import rebuild_manifest
+from pdf2imgbe.lib.tiles import get_dzi_descriptor
+from pdf2imgbe.lib.model import (
+    Conversion,
+    ConversionResults,
+    ConversionManifest,
+    ConversionStatusRequest,
+    ConversionStats,
+    ConversionProfile,
+    PageManifestEntry,
+)
+from pdf2imgbe.lib.statics import (
+    EnvKey,
+    RESULTS_FOLDER,
+    MANIFEST_FILENAME,
+    PROFILE_FOLDER,
+    PROFILE_STATS_FILENAME,
+    PROFILE_SUMMARY_FILENAME,
+    MAX_BULK_STATUS_IDS,
+    MAX_STATS_BUCKETS,
+    REQUEST_ID_HEADER,
+    TILES_FOLDER_FORMAT,
+    TILE_FILE_EXTENSION,
+    ConversionStatus,
+    StatsBucket,
+)
+
+# Resources of the app, set up when the app starts in each worker process
+sql_client: SQLClient = None
+scheduler: ConversionScheduler = None
+page_manifest_cache = TTLCache(int(os.getenv(EnvKey.CACHE_MAX_SIZE_KEY)), int(os.getenv(EnvKey.CACHE_TTL_KEY)))
+stats_cache = TTLCache(int(os.getenv(EnvKey.CACHE_MAX_SIZE_KEY)), int(os.getenv(EnvKey.CACHE_TTL_KEY)))
+
+
+async def _resume_conversions(interval: float):
+    """
+    Resume periodically the conversions requeued by the backend processes that shut down, so that the conversions
+    requeued by the old replicas during a rolling deploy are picked up by the new ones.
+
+    Parameters
+    ----------
+    interval : float
+        Time in seconds between two resumptions.
+    """
+
+    while True:
+        try:
+            await scheduler.resume()
+        except Exception as e:
+            logger.error(f"Failed to resume the requeued conversions: {e!r}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Set up the resources of the app when it starts, and drain the scheduler when it shuts down, so that the conversions
+    in progress are finished or requeued rather than lost.
+
+    The startup does not wait for the database: the connection is established by the first query, and the conversions
+    requeued by the backend processes that shut down are resumed in the background, periodically, while the app is
+    serving.
+
+    Parameters
+    ----------
+    app : FastAPI
+        The app.
+    """
 
-from pdf2imgbe.services.db import SQLClient
-from pdf2imgbe.lib.pdf_converter import convert_pdf_to_images
-from pdf2imgbe.lib.model import Conversion, ConversionResults
-from pdf2imgbe.lib.statics import RESULTS_FOLDER, IMAGE_FILENAME_FORMAT, ConversionStatus
+    global sql_client, scheduler
+    os.makedirs(RESULTS_FOLDER, exist_ok=True)
+    sql_client = SQLClient()
+    scheduler = ConversionScheduler(
+        sql_client,
+        int(os.getenv(EnvKey.MAX_CONCURRENT_CONVERSIONS_KEY)),
+        int(os.getenv(EnvKey.WORKER_MEMORY_LIMIT_MB_KEY)),
+    )
+    resume_task = asyncio.create_task(_resume_conversions(float(os.getenv(EnvKey.RESUME_INTERVAL_KEY))))
+    yield
+    resume_task.cancel()
+    await asyncio.gather(resume_task, return_exceptions=True)
+    await scheduler.drain(float(os.getenv(EnvKey.DRAIN_TIMEOUT_KEY)))
+    sql_client.close()
 
 
 # Initialize the app
@@ -21,10 +111,127 @@ app = FastAPI(
     title="PDF2IMG-be",
     description="PDF to Image Converter Backend. This API allows you to convert PDF files to images, check the status of the conversion process, and retrieve the converted images.",
     version="0.0.1",
+    lifespan=lifespan,
 )
-sql_client = SQLClient()
-if not os.path.exists(RESULTS_FOLDER):
-    os.makedirs(RESULTS_FOLDER)
+
+
+def _get_path_params(request: Request) -> T.Dict[str, T.Any]:
+    """
+    Get the path parameters of a request before it is routed, since the middlewares run before the routing fills them.
+
+    Parameters
+    ----------
+    request : Request
+        Incoming request.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Path parameters of the route matching the request, or an empty dictionary if no route matches.
+    """
+
+    for route in request.app.router.routes:
+        match, child_scope = route.matches(request.scope)
+        if match == Match.FULL:
+            return child_scope.get("path_params", {})
+    return {}
+
+
+@app.middleware("http")
+async def correlate_request(request: Request, call_next) -> Response:
+    """
+    Bind the request ID received from the frontend, or a new one, and the ID of the conversion concerned by the request
+    to the logs of the request, and return the request ID in the response.
+
+    Parameters
+    ----------
+    request : Request
+        Incoming request.
+    call_next : Callable
+        Function serving the request.
+
+    Returns
+    -------
+    Response
+        Response to the request.
+    """
+
+    request_id = request.headers.get(REQUEST_ID_HEADER) or uuid4().hex
+    request_id_var.set(request_id)
+    conversion_id_var.set(_get_path_params(request).get("id") or request.query_params.get("id"))
+    response = await call_next(request)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def _get_conversion_id(id: str) -> str:
+    """
+    Get the canonical form of a conversion ID, which names the results folder of the conversion.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion, as received.
+
+    Returns
+    -------
+    str
+        Canonical ID of the conversion.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing or not a valid UUID, and so not found.
+    """
+
+    if not id:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Missing ID.")
+    canonical_id = canonical_uuid(id)
+    if canonical_id is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="ID not found.")
+    return canonical_id
+
+
+def _get_conversion_manifest(id: str) -> ConversionManifest:
+    """
+    Get the manifest of a completed conversion, caching it since the results of a completed conversion do not change.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+
+    Returns
+    -------
+    ConversionManifest
+        Manifest of the conversion.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing, not found, the conversion is not completed yet, or its results are no longer available.
+    """
+
+    id = _get_conversion_id(id)
+    manifest = page_manifest_cache.get(id)
+    if manifest is not None:
+        return manifest
+
+    conversion = sql_client.conversion_get_by_id(id)
+    if conversion is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="ID not found.")
+    if conversion.status != ConversionStatus.COMPLETED:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Conversion is not completed yet.")
+    try:
+        with open(f"{RESULTS_FOLDER}/{id}/{MANIFEST_FILENAME}") as f:
+            manifest = ConversionManifest.from_dict(json.load(f))
+    except FileNotFoundError:
+        # Conversions completed before the manifests were introduced only have their images
+        manifest = rebuild_manifest(id, f"{RESULTS_FOLDER}/{id}")
+        if manifest is None:
+            raise HTTPException(status_code=HTTPStatus.GONE, detail="Conversion results are no longer available.")
+    page_manifest_cache.set(id, manifest)
+    return manifest
 
 
 @app.get("/ams/health", tags=["AMS"], description="Health check endpoint.")
@@ -58,19 +265,144 @@ async def get_conversions() -> T.List[Conversion]:
     return conversions
 
 
+@app.get("/ams/stats", tags=["AMS"], description="Retrieve the aggregated statistics of the conversions.")
+async def get_stats(hours: int = 24, bucket: StatsBucket = StatsBucket.HOUR) -> ConversionStats:
+    """
+    Retrieve the aggregated statistics of the conversions of the last hours, computed by the database. The statistics
+    are cached for a short time, so that dashboards polling them do not load the database.
+
+    Parameters
+    ----------
+    hours : int
+        Number of hours of the window of the statistics.
+    bucket : StatsBucket
+        Time bucket of the throughput.
+
+    Returns
+    -------
+    ConversionStats
+        Counts by status, throughput per bucket and percentiles of the duration of the conversions.
+
+    Raises
+    ------
+    HTTPException
+        If the window is not positive or is split in too many buckets.
+    """
+
+    logger.info("Recevied request: get_stats")
+    if hours <= 0:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="The number of hours must be positive.")
+    if hours * 3600 / bucket.seconds > MAX_STATS_BUCKETS:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=f"Too many buckets, maximum is {MAX_STATS_BUCKETS}.")
+    cache_key = f"{hours}:{bucket.value}"
+    stats = stats_cache.get(cache_key)
+    if stats is None:
+        stats = sql_client.conversion_get_stats(datetime.now() - timedelta(hours=hours), bucket)
+        stats_cache.set(cache_key, stats)
+    return stats
+
+
+def _get_profile_path(id: str) -> str:
+    """
+    Get the path of the profile of a conversion.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+
+    Returns
+    -------
+    str
+        Path of the profile folder of the conversion.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing or not found, or the conversion was not profiled.
+    """
+
+    id = _get_conversion_id(id)
+    if sql_client.conversion_get_by_id(id) is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="ID not found.")
+    profile_path = f"{RESULTS_FOLDER}/{id}/{PROFILE_FOLDER}"
+    if not os.path.exists(f"{profile_path}/{PROFILE_SUMMARY_FILENAME}"):
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Profile not found.")
+    return profile_path
+
+
+@app.get("/ams/conversion/profile", tags=["AMS"], description="Retrieve the profile of a conversion.")
+async def get_conversion_profile(id: str) -> ConversionProfile:
+    """
+    Retrieve the summary of the profile of a conversion: time spent in each step, peak memory of the processes and
+    functions with the highest cumulative time.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+
+    Returns
+    -------
+    ConversionProfile
+        Summary of the profile.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing or not found, or the conversion was not profiled.
+    """
+
+    logger.info("Recevied request: get_conversion_profile")
+    with open(f"{_get_profile_path(id)}/{PROFILE_SUMMARY_FILENAME}") as f:
+        return ConversionProfile.from_dict(json.load(f))
+
+
+@app.get("/ams/conversion/profile/stats", tags=["AMS"], description="Download the cProfile statistics of a conversion.")
+async def get_conversion_profile_stats(id: str) -> FileResponse:
+    """
+    Download the cProfile statistics of the workers of a conversion, to be loaded with pstats or snakeviz.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+
+    Returns
+    -------
+    FileResponse
+        cProfile statistics file.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing or not found, or the conversion was not profiled.
+    """
+
+    logger.info("Recevied request: get_conversion_profile_stats")
+    stats_path = f"{_get_profile_path(id)}/{PROFILE_STATS_FILENAME}"
+    if not os.path.exists(stats_path):
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Profile not found.")
+    return FileResponse(stats_path, media_type="application/octet-stream", filename=f"{id}.prof")
+
+
 @app.post("/app/conversion", tags=["APP"], description="Convert a PDF file to images.")
 async def post_conversion(
-    background_tasks: BackgroundTasks, pdf_file: T.Annotated[UploadFile, File(description="The PDF file read as UploadFile")]
+    pdf_file: T.Annotated[UploadFile, File(description="The PDF file read as UploadFile")],
+    tiled: T.Annotated[bool, Form(description="Whether to also generate the Deep Zoom tiles of each page")] = False,
+    profile: T.Annotated[bool, Form(description="Whether to profile the conversion")] = False,
 ) -> Conversion:
     """
     Convert a PDF file to images.
 
     Parameters
     ----------
-    background_tasks : BackgroundTasks
-        Background tasks to handle the conversion process.
     pdf_file : UploadFile
         PDF file to convert.
+    tiled : bool
+        Whether to also generate the Deep Zoom tile pyramid of each page, to pan and zoom on very large pages.
+    profile : bool
+        Whether to profile the conversion; a share of the conversions given by the profile sample rate is profiled anyway.
 
     Returns
     -------
@@ -80,7 +412,7 @@ async def post_conversion(
     Raises
     ------
     HTTPException
-        If the file is missing or not a PDF file.
+        If the file is missing, not a valid PDF file, password protected, or too large to convert.
     """
 
     logger.info("Recevied request: post_conversion")
@@ -88,12 +420,34 @@ async def post_conversion(
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid file type. Only PDF files are accepted.")
 
     id = str(uuid4())
+    conversion_id_var.set(id)
     file_content = await pdf_file.read()
+    try:
+        preflight = await asyncio.to_thread(
+            preflight_pdf,
+            file_content,
+            int(os.getenv(EnvKey.PREFLIGHT_TIMEOUT_KEY)),
+            int(os.getenv(EnvKey.MAX_PAGES_KEY)),
+            float(os.getenv(EnvKey.MAX_ESTIMATED_MEGAPIXELS_KEY)),
+        )
+    except ProcessException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     output_path = f"{RESULTS_FOLDER}/{id}"
-    conversion = Conversion(id=id, filename=pdf_file.filename, status=ConversionStatus.RUNNING, start_date=datetime.now())
+    now = datetime.now()
+    conversion = Conversion(
+        id=id,
+        filename=pdf_file.filename,
+        status=ConversionStatus.QUEUED,
+        start_date=now,
+        update_date=now,
+        page_count=preflight.page_count,
+        estimated_megapixels=preflight.estimated_megapixels,
+        tiled=tiled,
+    )
 
     sql_client.conversion_create(conversion)
-    background_tasks.add_task(convert_pdf_to_images, sql_client, conversion, file_content, output_path)
+    profiled = profile or random.random() < float(os.getenv(EnvKey.PROFILE_SAMPLE_RATE_KEY))
+    scheduler.submit(conversion, file_content, output_path, profiled)
 
     return conversion
 
@@ -119,7 +473,7 @@ async def get_conversion(id: str) -> Conversion:
         If the ID is missing or not found.
     """
 
-    logger.info("Recevied request: get_conversion")
+    logger.info("Recevied request: get_conversion", extra={"sampled": True})
     if not id:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Missing ID.")
     conversion = sql_client.conversion_get_by_id(id)
@@ -128,6 +482,101 @@ async def get_conversion(id: str) -> Conversion:
     return conversion
 
 
+@app.post("/app/conversion/status", tags=["APP"], description="Get the conversions with the provided IDs.")
+async def get_conversions_status(status_request: ConversionStatusRequest) -> T.List[Conversion]:
+    """
+    Get the conversions with the provided IDs with a single query, optionally only those updated after a date.
+
+    Parameters
+    ----------
+    status_request : ConversionStatusRequest
+        IDs of the conversions and optional date of the last check.
+
+    Returns
+    -------
+    conversions : list
+        List of conversions found; unknown IDs are omitted.
+
+    Raises
+    ------
+    HTTPException
+        If the IDs are missing or too many.
+    """
+
+    logger.info("Recevied request: get_conversions_status", extra={"sampled": True})
+    if not status_request.ids:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Missing IDs.")
+    if len(status_request.ids) > MAX_BULK_STATUS_IDS:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=f"Too many IDs, maximum is {MAX_BULK_STATUS_IDS}.")
+    return sql_client.conversion_get_by_ids(status_request.ids, status_request.changed_since)
+
+
+@app.post("/app/conversion/cancel", tags=["APP"], description="Cancel the queued or running conversion with the provided ID.")
+async def cancel_conversion(id: str) -> Conversion:
+    """
+    Cancel the queued or running conversion with the provided ID. The conversion is marked as cancelled in the database
+    only if still queued or running, then interrupted by the backend process running it, whichever it is.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+
+    Returns
+    -------
+    conversion : Conversion
+        Conversion representation.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing, not found, or the conversion is already finished.
+    """
+
+    logger.info("Recevied request: cancel_conversion")
+    id = _get_conversion_id(id)
+    conversion = sql_client.conversion_get_by_id(id)
+    if conversion is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="ID not found.")
+    previous_status = sql_client.conversion_cancel(id)
+    if previous_status is None:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Conversion is already finished.")
+
+    # A conversion queued in no scheduler was requeued by a backend process that shut down, and only its PDF file remains
+    if not scheduler.cancel(id) and previous_status == ConversionStatus.QUEUED:
+        shutil.rmtree(f"{RESULTS_FOLDER}/{id}", ignore_errors=True)
+    conversion.status = ConversionStatus.CANCELLED
+    return conversion
+
+
+def _get_manifest_page(id: str, page: int) -> PageManifestEntry:
+    """
+    Get the manifest entry of a page of a completed conversion.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+    page : int
+        Number of the page, starting from 1.
+
+    Returns
+    -------
+    PageManifestEntry
+        Manifest entry of the page.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing, not found, the conversion is not completed yet, or the page does not exist.
+    """
+
+    manifest = _get_conversion_manifest(id)
+    if not 1 <= page <= manifest.page_count:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Page not found.")
+    return manifest.pages[page - 1]
+
+
 @app.get("/app/conversion/results", tags=["APP"], description="Retrieve the converted images.")
 async def get_conversion_results(id: str) -> ConversionResults:
     """
@@ -146,29 +595,154 @@ async def get_conversion_results(id: str) -> ConversionResults:
     Raises
     ------
     HTTPException
-        If the ID is missing, not found, or the conversion is not completed yet.
+        If the ID is missing, not found, the conversion is not completed yet, or its results are no longer available.
     """
 
     logger.info("Recevied request: get_conversion_results")
-    if not id:
-        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Missing ID.")
-    conversion = sql_client.conversion_get_by_id(id)
-    if conversion is None:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="ID not found.")
-    if conversion.status != ConversionStatus.COMPLETED:
-        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Conversion is not completed yet.")
-
-    images_folder_path = f"{RESULTS_FOLDER}/{id}/"
-    ordered_images_paths = sorted(  # Sort the images by their page number contained in the filename
-        os.listdir(images_folder_path), key=lambda x: int(re.match(IMAGE_FILENAME_FORMAT.replace("{}", r"(\d+)"), x).group(1))
-    )
+    id = _get_conversion_id(id)
+    manifest = _get_conversion_manifest(id)
     images_bytes = []
-    for filename in ordered_images_paths:
-        with open(images_folder_path + filename, "rb") as f:
+    for page in manifest.pages:
+        with open(f"{RESULTS_FOLDER}/{id}/{page.filename}", "rb") as f:
             images_bytes.append(base64.b64encode(f.read()).decode("utf-8"))
     conversion_results = ConversionResults(id=id, images_bytes=images_bytes)
     return conversion_results
 
 
+@app.get("/app/conversion/manifest", tags=["APP"], description="Retrieve the manifest of the converted images.")
+async def get_conversion_manifest(id: str) -> ConversionManifest:
+    """
+    Retrieve the manifest of the converted images, describing each page without transferring it.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+
+    Returns
+    -------
+    manifest : ConversionManifest
+        Conversion manifest representation.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing, not found, the conversion is not completed yet, or its results are no longer available.
+    """
+
+    logger.info("Recevied request: get_conversion_manifest")
+    return _get_conversion_manifest(id)
+
+
+@app.api_route("/app/conversion/page", methods=["GET", "HEAD"], tags=["APP"], description="Retrieve a single converted image.")
+async def get_conversion_page(id: str, page: int, verify: bool = False) -> FileResponse:
+    """
+    Retrieve a single converted image.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+    page : int
+        Number of the page, starting from 1.
+    verify : bool
+        Whether to verify the integrity of the image against the checksum of the manifest before returning it.
+
+    Returns
+    -------
+    FileResponse
+        Image of the page, with its checksum as ETag.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is missing, not found, the conversion is not completed yet, the page does not exist, or the image is
+        corrupted.
+    """
+
+    logger.info("Recevied request: get_conversion_page")
+    id = _get_conversion_id(id)
+    page_entry = _get_manifest_page(id, page)
+    image_path = f"{RESULTS_FOLDER}/{id}/{page_entry.filename}"
+    if verify:
+        with open(image_path, "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != page_entry.checksum:
+                raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Page image is corrupted.")
+    return FileResponse(image_path, media_type=f"image/{page_entry.format.lower()}", headers={"ETag": f'"{page_entry.checksum}"'})
+
+
+@app.get("/app/conversion/{id}/tiles/{page}.dzi", tags=["APP"], description="Retrieve the Deep Zoom descriptor of a page.")
+async def get_conversion_page_dzi(id: str, page: int) -> Response:
+    """
+    Retrieve the Deep Zoom descriptor of a page of a tiled conversion, from which viewers resolve the URLs of the tiles.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+    page : int
+        Number of the page, starting from 1.
+
+    Returns
+    -------
+    Response
+        DZI XML descriptor of the page.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is not found, the conversion is not completed yet, the page does not exist, or the page is not tiled.
+    """
+
+    logger.info("Recevied request: get_conversion_page_dzi")
+    page_entry = _get_manifest_page(id, page)
+    if page_entry.tile_levels is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Page is not tiled.")
+    return Response(get_dzi_descriptor(page_entry.width, page_entry.height), media_type="application/xml")
+
+
+@app.get(
+    "/app/conversion/{id}/tiles/{page}_files/{level}/{column}_{row}.png",
+    tags=["APP"],
+    description="Retrieve a Deep Zoom tile of a page.",
+)
+async def get_conversion_page_tile(id: str, page: int, level: int, column: int, row: int) -> FileResponse:
+    """
+    Retrieve a Deep Zoom tile of a page of a tiled conversion.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+    page : int
+        Number of the page, starting from 1.
+    level : int
+        Level of the pyramid, from 0 (1x1 pixel) to full resolution.
+    column : int
+        Column of the tile in the level.
+    row : int
+        Row of the tile in the level.
+
+    Returns
+    -------
+    FileResponse
+        Image of the tile.
+
+    Raises
+    ------
+    HTTPException
+        If the ID is not found, the conversion is not completed yet, or the page or the tile do not exist.
+    """
+
+    id = _get_conversion_id(id)
+    page_entry = _get_manifest_page(id, page)
+    tile_path = f"{RESULTS_FOLDER}/{id}/{TILES_FOLDER_FORMAT.format(page)}/{level}/{column}_{row}.{TILE_FILE_EXTENSION.lower()}"
+    if page_entry.tile_levels is None or not os.path.exists(tile_path):
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Tile not found.")
+    return FileResponse(tile_path, media_type=f"image/{TILE_FILE_EXTENSION.lower()}")
+
+
 if __name__ == "__main__":
-    uvicorn.run(app)
+    from pdf2imgbe.server import main
+
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark the latency of the SQLClient queries on a conversion table filled with synthetic conversions.
+
+The table is created from DDL.sql in a dedicated schema of the database configured in the .env.local file, so that the
+conversions of the application are not touched, and the schema is dropped at the end. Filling 10M rows takes a few
+minutes and about 2GB of disk.
+
+Usage, from the be folder:
+    python -m pdf2imgbe.benchmarks.conversion_table --rows 10000000
+"""
+
+import os
+from dotenv import load_dotenv
+
+dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../.env.local"))
+load_dotenv(dotenv_path, override=True)
+
+SCHEMA_NAME = "conversion_benchmark"
+# Every connection, including the one of the SQL client, resolves the conversion table in the benchmark schema
+os.environ["PGOPTIONS"] = f"-c search_path={SCHEMA_NAME},public"
+# Measure the database, not the cache of the SQL client
+os.environ["CACHE_MAX_SIZE"] = "0"
+
+import time
+import random
+import argparse
+import statistics
+import typing as T
+from uuid import uuid4
+from datetime import datetime, timedelta
+from psycopg2 import connect
+
+from pdf2imgbe.services.db import SQLClient
+from pdf2imgbe.lib.model import Conversion
+from pdf2imgbe.lib.statics import ConversionStatus
+
+DDL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../resources/DDL.sql"))
+
+# Mostly completed conversions over the last year, as in a long-running deployment
+FILL_QUERY = """
+INSERT INTO conversion (id, filename, status, start_date, update_date, end_date, page_count, estimated_megapixels)
+SELECT
+    gen_random_uuid(),
+    'benchmark_' || i || '.pdf',
+    status,
+    start_date,
+    start_date + duration,
+    CASE WHEN status IN ('COMPLETED', 'FAILED', 'CANCELLED') THEN start_date + duration END,
+    page_count,
+    page_count * 3.7
+FROM (
+    SELECT
+        i,
+        CASE
+            WHEN r < 0.90 THEN 'COMPLETED'
+            WHEN r < 0.95 THEN 'FAILED'
+            WHEN r < 0.98 THEN 'CANCELLED'
+            WHEN r < 0.99 THEN 'RUNNING'
+            ELSE 'QUEUED'
+        END::conversion_status AS status,
+        LOCALTIMESTAMP - random() * INTERVAL '365 days' AS start_date,
+        random() * INTERVAL '10 minutes' AS duration,
+        1 + (random() * 99)::INTEGER AS page_count
+    FROM (SELECT i, random() AS r FROM generate_series(%s, %s) AS i) AS s
+) AS rows
+"""
+FILL_BATCH_SIZE = 1_000_000
+
+# The access pattern served by the (status, start_date) index, e.g. the conversions still running since yesterday
+ACTIVE_QUERY = f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE status = 'RUNNING' AND start_date > %s"
+
+
+def _measure(name: str, query: T.Callable[[], T.Any], repeat: int):
+    """
+    Run a query many times and print its median and 95th percentile latency.
+
+    Parameters
+    ----------
+    name : str
+        Name of the query.
+    query : Callable
+        Function running the query.
+    repeat : int
+        Number of runs.
+    """
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        latencies.append((time.perf_counter() - start) * 1000)
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{name:<40} {statistics.median(latencies):>10.2f} {p95:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLClient queries on a large conversion table.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of conversions to generate")
+    parser.add_argument("--repeat", type=int, default=200, help="Number of runs of each query")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema at the end")
+    args = parser.parse_args()
+
+    connection = connect(
+        dbname=os.environ["DB_NAME"],
+        user=os.environ["DB_USER"],
+        password=os.environ["DB_PASSWORD"],
+        host=os.environ["DB_SERVICE_HOST"],
+        port=os.environ["DB_SERVICE_PORT"],
+    )
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA_NAME} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA_NAME}")
+        with open(DDL_PATH) as f:
+            cursor.execute(f.read())
+
+        fill_start = time.perf_counter()
+        for first_row in range(1, args.rows + 1, FILL_BATCH_SIZE):
+            cursor.execute(FILL_QUERY, (first_row, min(first_row + FILL_BATCH_SIZE - 1, args.rows)))
+            print(f"Generated {min(first_row + FILL_BATCH_SIZE - 1, args.rows)}/{args.rows} conversions")
+        cursor.execute("ANALYZE conversion")
+        print(f"Filled the table in {time.perf_counter() - fill_start:.0f} seconds")
+
+        cursor.execute("SELECT id FROM conversion TABLESAMPLE SYSTEM (1) LIMIT 10000")
+        ids = [row[0] for row in cursor.fetchall()]
+
+    sql_client = SQLClient()
+    yesterday = datetime.now() - timedelta(days=1)
+    print(f"\n{'Query':<40} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    _measure("conversion_get_by_id", lambda: sql_client.conversion_get_by_id(random.choice(ids)), args.repeat)
+    _measure("conversion_get_by_ids (100 IDs)", lambda: sql_client.conversion_get_by_ids(random.sample(ids, 100)), args.repeat)
+    _measure(
+        "conversion_get_by_ids (100 IDs, changed)",
+        lambda: sql_client.conversion_get_by_ids(random.sample(ids, 100), yesterday),
+        args.repeat,
+    )
+    _measure(
+        "conversion_create",
+        lambda: sql_client.conversion_create(
+            Conversion(id=str(uuid4()), filename="benchmark.pdf", status=ConversionStatus.QUEUED, start_date=datetime.now())
+        ),
+        args.repeat,
+    )
+    _measure(
+        "conversion_update_status",
+        lambda: sql_client.conversion_update_status(random.choice(ids), ConversionStatus.COMPLETED),
+        args.repeat,
+    )
+    with connection.cursor() as cursor:
+        _measure("running since yesterday (status index)", lambda: cursor.execute(ACTIVE_QUERY, (yesterday,)), args.repeat)
+
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA {SCHEMA_NAME} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
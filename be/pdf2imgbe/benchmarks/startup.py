@@ -0,0 +1,140 @@
+"""
+Benchmark the cold start of the backend: the time to import the app in a fresh interpreter, with the heavy modules it
+loads, and the time from the launch of the server until it answers the health check, then until it exits on SIGTERM.
+
+The server is started with a single worker and the environment of the .env.local file; the database does not need to
+be running, since the connection is only established by the first query.
+
+Usage, from the be folder:
+    python -m pdf2imgbe.benchmarks.startup --repeat 10
+"""
+
+import os
+from dotenv import load_dotenv
+
+dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../.env.local"))
+load_dotenv(dotenv_path, override=True)
+
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import statistics
+import subprocess
+import typing as T
+import urllib.request
+
+# Modules that the backend does not need to import before serving its first request
+HEAVY_MODULES = ("pdf2image", "PIL", "pandas", "numpy")
+IMPORT_SCRIPT = f"""
+import sys, json, time
+start = time.perf_counter()
+import pdf2imgbe.app
+print(json.dumps({{"seconds": time.perf_counter() - start, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+READY_TIMEOUT = 60
+
+
+def _print_latencies(name: str, latencies: T.List[float]):
+    """
+    Print the median and 95th percentile of latencies.
+
+    Parameters
+    ----------
+    name : str
+        Name of the measure.
+    latencies : List[float]
+        Latencies in seconds.
+    """
+
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(f"{name:<40} {statistics.median(latencies) * 1000:>10.0f} {p95 * 1000:>10.0f}")
+
+
+def _measure_import() -> T.Tuple[float, T.List[str]]:
+    """
+    Import the app in a fresh interpreter.
+
+    Returns
+    -------
+    Tuple[float, List[str]]
+        Import time in seconds, and heavy modules loaded by the import.
+    """
+
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"]
+
+
+def _measure_server(port: int) -> T.Tuple[float, float]:
+    """
+    Start the server, wait until it answers the health check, then stop it.
+
+    Parameters
+    ----------
+    port : int
+        Port of the server.
+
+    Returns
+    -------
+    Tuple[float, float]
+        Time in seconds until the server is ready, and until it exits once stopped.
+    """
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "pdf2imgbe.server", "--workers", "1", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if time.perf_counter() - start > READY_TIMEOUT or server.poll() is not None:
+                raise RuntimeError("The server did not start")
+            try:
+                with urllib.request.urlopen(f"http://localhost:{port}/ams/health", timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.01)
+        ready = time.perf_counter() - start
+
+        stop = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        server.wait(READY_TIMEOUT)
+        return ready, time.perf_counter() - stop
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the backend.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of runs of each measure")
+    args = parser.parse_args()
+
+    import_times, loaded = [], set()
+    for _ in range(args.repeat):
+        seconds, modules = _measure_import()
+        import_times.append(seconds)
+        loaded.update(modules)
+
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        port = s.getsockname()[1]
+    ready_times, stop_times = [], []
+    for _ in range(args.repeat):
+        ready, stop = _measure_server(port)
+        ready_times.append(ready)
+        stop_times.append(stop)
+
+    print(f"\n{'Measure':<40} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    _print_latencies("import pdf2imgbe.app", import_times)
+    _print_latencies("launch until health check", ready_times)
+    _print_latencies("SIGTERM until exit", stop_times)
+    print(f"\nHeavy modules loaded by the import: {', '.join(sorted(loaded)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
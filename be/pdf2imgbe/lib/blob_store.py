@@ -0,0 +1,88 @@
+import os
+import typing as T
+from uuid import uuid4
+
+from pdf2imgbe.lib.statics import BLOBS_FOLDER
+
+
+def blob_path(checksum: str, image_format: str) -> str:
+    """
+    Get the path of the blob of an image in the content-addressed store.
+
+    Parameters
+    ----------
+    checksum : str
+        SHA-256 checksum of the encoded image.
+    image_format : str
+        Format of the image.
+
+    Returns
+    -------
+    str
+        Path of the blob.
+    """
+
+    return f"{BLOBS_FOLDER}/{checksum[:2]}/{checksum}.{image_format.lower()}"
+
+
+def store_page(image_bytes: bytes, checksum: str, image_format: str, page_path: str):
+    """
+    Store an encoded page image in the content-addressed store and link it in the results of a conversion.
+
+    The blob is written only if no conversion stored the same image before, and the page path is a hard link to it, so
+    that identical pages share the same file on disk. The link count of the blob is its reference count.
+
+    Parameters
+    ----------
+    image_bytes : bytes
+        Encoded image.
+    checksum : str
+        SHA-256 checksum of the encoded image.
+    image_format : str
+        Format of the image.
+    page_path : str
+        Path of the page in the results of the conversion.
+    """
+
+    path = blob_path(checksum, image_format)
+    while True:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{uuid4()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(image_bytes)
+            try:
+                os.link(temp_path, path)  # Atomically publish the blob, unless another worker did it first
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(temp_path)
+        # The results of a conversion that failed while the page was rendered are removed meanwhile, and removed again
+        # with the page once rendered
+        os.makedirs(os.path.dirname(page_path), exist_ok=True)
+        try:
+            os.link(path, page_path)
+            return
+        except FileNotFoundError:  # The blob was released by another conversion in the meantime: store it again
+            continue
+
+
+def release_blobs(checksums: T.Iterable[str], image_format: str):
+    """
+    Remove the blobs no longer referenced by any conversion, after the results linking them have been deleted.
+
+    Parameters
+    ----------
+    checksums : Iterable[str]
+        SHA-256 checksums of the images of the deleted results.
+    image_format : str
+        Format of the images.
+    """
+
+    for checksum in set(checksums):
+        path = blob_path(checksum, image_format)
+        try:
+            if os.stat(path).st_nlink <= 1:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,80 @@
+import time
+import threading
+import typing as T
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache that evicts the least recently used entries and expires entries after a time to live.
+    """
+
+    _max_size: int
+    _ttl: float
+    _entries: T.OrderedDict[T.Hashable, T.Tuple[float, T.Any]]
+    _lock: threading.Lock
+
+    def __init__(self, max_size: int, ttl: float):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: T.Hashable) -> T.Optional[T.Any]:
+        """
+        Get the value cached for a key.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+
+        Returns
+        -------
+        Any, optional
+            Cached value, or None if the key is not cached or its entry expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiration, value = entry
+            if expiration < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: T.Hashable, value: T.Any):
+        """
+        Cache a value for a key, evicting the least recently used entry if the cache is full.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+        value : Any
+            Value to cache.
+        """
+
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: T.Hashable):
+        """
+        Remove the entry of a key from the cache.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
@@ -2,7 +2,7 @@ import typing as T
 from datetime import datetime
 from pydantic import BaseModel
 
-from pdf2imgbe.lib.statics import ConversionStatus
+from pdf2imgbe.lib.statics import ConversionStatus, StatsBucket
 
 
 class Conversion(BaseModel):
@@ -14,6 +14,13 @@ class Conversion(BaseModel):
     filename: str
     status: ConversionStatus
     start_date: datetime
+    update_date: T.Optional[datetime] = None
+    end_date: T.Optional[datetime] = None
+    duration_seconds: T.Optional[float] = None
+    failure_reason: T.Optional[str] = None
+    page_count: T.Optional[int] = None
+    estimated_megapixels: T.Optional[float] = None
+    tiled: bool = False
 
     def from_dict(data: T.Dict[str, T.Any]):
         """
@@ -31,7 +38,17 @@ class Conversion(BaseModel):
         """
 
         return Conversion(
-            id=data["id"], filename=data["filename"], status=ConversionStatus(data["status"]), start_date=data["start_date"]
+            id=data["id"],
+            filename=data["filename"],
+            status=ConversionStatus(data["status"]),
+            start_date=data["start_date"],
+            update_date=data.get("update_date"),
+            end_date=data.get("end_date"),
+            duration_seconds=data.get("duration_seconds"),
+            failure_reason=data.get("failure_reason"),
+            page_count=data.get("page_count"),
+            estimated_megapixels=data.get("estimated_megapixels"),
+            tiled=data.get("tiled", False),
         )
 
     def to_dict(self):
@@ -44,7 +61,68 @@ class Conversion(BaseModel):
             Dictionary representation of the conversion.
         """
 
-        return {"id": self.id, "filename": self.filename, "status": self.status.value, "start_date": self.start_date.isoformat()}
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status.value,
+            "start_date": self.start_date.isoformat(),
+            "update_date": self.update_date.isoformat() if self.update_date else None,
+            "end_date": self.end_date.isoformat() if self.end_date else None,
+            "duration_seconds": self.duration_seconds,
+            "failure_reason": self.failure_reason,
+            "page_count": self.page_count,
+            "estimated_megapixels": self.estimated_megapixels,
+            "tiled": self.tiled,
+        }
+
+
+class PdfPreflight(BaseModel):
+    """
+    Represents the information gathered on a PDF file before queuing its conversion.
+    """
+
+    page_count: int
+    page_sizes: T.List[T.Tuple[float, float]]
+    encrypted: bool
+    estimated_megapixels: float
+
+    def from_dict(data: T.Dict[str, T.Any]):
+        """
+        Create a PDF preflight from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary representation of the PDF preflight.
+
+        Returns
+        -------
+        PdfPreflight
+            PDF preflight object.
+        """
+
+        return PdfPreflight(**data)
+
+    def to_dict(self):
+        """
+        Return the PDF preflight as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dictionary representation of the PDF preflight.
+        """
+
+        return self.model_dump()
+
+
+class ConversionStatusRequest(BaseModel):
+    """
+    Represents a request for the status of many conversions.
+    """
+
+    ids: T.List[str]
+    changed_since: T.Optional[datetime] = None
 
 
 class ConversionResults(BaseModel):
@@ -83,3 +161,208 @@ class ConversionResults(BaseModel):
         """
 
         return {"id": self.id, "images_bytes": self.images_bytes}
+
+
+class PageManifestEntry(BaseModel):
+    """
+    Represents a converted page in the manifest of a conversion.
+    """
+
+    page: int
+    filename: str
+    size: int
+    width: int
+    height: int
+    checksum: str
+    format: str
+    tile_levels: T.Optional[int] = None
+
+    def from_dict(data: T.Dict[str, T.Any]):
+        """
+        Create a page manifest entry from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary representation of the page manifest entry.
+
+        Returns
+        -------
+        PageManifestEntry
+            Page manifest entry object.
+        """
+
+        return PageManifestEntry(**data)
+
+    def to_dict(self):
+        """
+        Return the page manifest entry as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dictionary representation of the page manifest entry.
+        """
+
+        return self.model_dump()
+
+
+class ConversionManifest(BaseModel):
+    """
+    Represents the manifest of a completed conversion, listing its pages ordered by page number.
+    """
+
+    id: str
+    page_count: int
+    pages: T.List[PageManifestEntry]
+
+    def from_dict(data: T.Dict[str, T.Any]):
+        """
+        Create a conversion manifest from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary representation of the conversion manifest.
+
+        Returns
+        -------
+        ConversionManifest
+            Conversion manifest object.
+        """
+
+        return ConversionManifest(
+            id=data["id"], page_count=data["page_count"], pages=[PageManifestEntry.from_dict(p) for p in data["pages"]]
+        )
+
+    def to_dict(self):
+        """
+        Return the conversion manifest as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dictionary representation of the conversion manifest.
+        """
+
+        return {"id": self.id, "page_count": self.page_count, "pages": [p.to_dict() for p in self.pages]}
+
+
+class ThroughputBucket(BaseModel):
+    """
+    Represents the conversions finished in a time bucket.
+    """
+
+    start_date: datetime
+    status_counts: T.Dict[str, int]
+
+    def from_dict(data: T.Dict[str, T.Any]):
+        """
+        Create a throughput bucket from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary representation of the throughput bucket.
+
+        Returns
+        -------
+        ThroughputBucket
+            Throughput bucket object.
+        """
+
+        return ThroughputBucket(**data)
+
+    def to_dict(self):
+        """
+        Return the throughput bucket as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dictionary representation of the throughput bucket.
+        """
+
+        return self.model_dump()
+
+
+class ConversionStats(BaseModel):
+    """
+    Represents the aggregated statistics of the conversions started or finished since a date.
+    """
+
+    since: datetime
+    bucket: StatsBucket
+    status_counts: T.Dict[str, int]
+    throughput: T.List[ThroughputBucket]
+    duration_percentiles: T.Dict[str, T.Optional[float]]
+
+    def from_dict(data: T.Dict[str, T.Any]):
+        """
+        Create conversion statistics from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary representation of the conversion statistics.
+
+        Returns
+        -------
+        ConversionStats
+            Conversion statistics object.
+        """
+
+        return ConversionStats(**data)
+
+    def to_dict(self):
+        """
+        Return the conversion statistics as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dictionary representation of the conversion statistics.
+        """
+
+        return self.model_dump()
+
+
+class ConversionProfile(BaseModel):
+    """
+    Represents the profile of a conversion process.
+    """
+
+    id: str
+    wall_seconds: float
+    spans: T.Dict[str, T.Dict[str, T.Union[int, float]]]
+    peak_memory_mb: T.Dict[str, float]
+    top_functions: T.List[T.Dict[str, T.Any]]
+
+    def from_dict(data: T.Dict[str, T.Any]):
+        """
+        Create a conversion profile from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary representation of the conversion profile.
+
+        Returns
+        -------
+        ConversionProfile
+            Conversion profile object.
+        """
+
+        return ConversionProfile(**data)
+
+    def to_dict(self):
+        """
+        Return the conversion profile as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dictionary representation of the conversion profile.
+        """
+
+        return self.model_dump()
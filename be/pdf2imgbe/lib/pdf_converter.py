@@ -1,59 +1,408 @@
 from pdf2imgbe.lib.log import logger
 
+import io
 import os
+import shutil
+import json
+import hashlib
 import asyncio
-import pdf2image
+import resource
+import typing as T
+from concurrent.futures import Executor, Future
 
-from pdf2imgbe.services.db import SQLClient
 from pdf2imgbe.lib.exception import ProcessException
-from pdf2imgbe.lib.model import Conversion
-from pdf2imgbe.lib.statics import EnvKey, ConversionStatus, IMAGE_FILENAME_FORMAT, IMAGE_FILE_EXTENSION
+from pdf2imgbe.lib.blob_store import store_page, release_blobs
+from pdf2imgbe.lib.tiles import generate_tiles
+from pdf2imgbe.lib.profiling import SpanTimer, ConversionProfiler, profile_call
+from pdf2imgbe.lib.model import Conversion, ConversionManifest, PageManifestEntry
+from pdf2imgbe.lib.statics import (
+    EnvKey,
+    ConversionStatus,
+    IMAGE_FILENAME_FORMAT,
+    IMAGE_FILE_EXTENSION,
+    IMAGE_DPI,
+    SOURCE_FILENAME,
+    MANIFEST_FILENAME,
+    TILES_FOLDER_FORMAT,
+    PROFILE_FOLDER,
+)
 
+# Only the workers render the pages, and the SQL client is only needed for the type hints, so that importing the module
+# in the backend does not load pdf2image and PIL, nor psycopg2 in the workers
+if T.TYPE_CHECKING:
+    from pdf2imgbe.services.db import SQLClient
 
-async def convert_pdf_to_images(sql_client: SQLClient, conversion: Conversion, file_content: bytes, output_path: str):
+
+def limit_worker_resources(memory_limit_mb: int):
+    """
+    Limit the address space of the current worker process, and therefore of the poppler processes it spawns, so that a
+    pathological PDF fails with a memory error instead of exhausting the memory of the node.
+
+    Parameters
+    ----------
+    memory_limit_mb : int
+        Maximum address space in megabytes; 0 disables the limit.
+    """
+
+    if memory_limit_mb > 0:
+        memory_limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def save_source(file_content: bytes, output_path: str) -> str:
+    """
+    Save the PDF file of a conversion in its output path, where it stays until the conversion finishes, so that an
+    interrupted conversion can be resumed from it. The file is written atomically, since a backend process resuming the
+    conversion may read it meanwhile.
+
+    Parameters
+    ----------
+    file_content : bytes
+        Content of the PDF file.
+    output_path : str
+        Path where the images of the conversion are saved.
+
+    Returns
+    -------
+    str
+        Path of the PDF file.
+    """
+
+    os.makedirs(output_path, exist_ok=True)
+    source_path = f"{output_path}/{SOURCE_FILENAME}"
+    with open(f"{source_path}.tmp", "wb") as f:
+        f.write(file_content)
+    os.replace(f"{source_path}.tmp", source_path)
+    return source_path
+
+
+def _get_page_count(source_path: str, timeout: int) -> int:
+    """
+    Get the number of pages of a PDF file.
+
+    Parameters
+    ----------
+    source_path : str
+        Path of the PDF file.
+    timeout : int
+        Maximum time in seconds allowed to read the PDF information.
+
+    Returns
+    -------
+    int
+        Number of pages.
+    """
+
+    import pdf2image
+
+    return pdf2image.pdfinfo_from_path(source_path, timeout=timeout)["Pages"]
+
+
+def _convert_page(
+    source_path: str, page: int, output_path: str, timeout: int, tiled: bool, spans: T.Optional[SpanTimer] = None
+) -> PageManifestEntry:
+    """
+    Convert a single page of a PDF file to an image, save it in the output path through the content-addressed store and
+    describe it for the manifest. If requested, the Deep Zoom tile pyramid of the page is saved as well.
+
+    Parameters
+    ----------
+    source_path : str
+        Path of the PDF file.
+    page : int
+        Number of the page to convert, starting from 1.
+    output_path : str
+        Path to save the image.
+    timeout : int
+        Maximum time in seconds allowed to render the page.
+    tiled : bool
+        Whether to generate the tile pyramid of the page.
+    spans : SpanTimer, optional
+        Timer of the steps of the conversion, when profiled.
+
+    Returns
+    -------
+    PageManifestEntry
+        Manifest entry of the page.
+    """
+
+    import pdf2image
+
+    spans = spans or SpanTimer(enabled=False)
+    with spans.span("render"):
+        image = pdf2image.convert_from_path(source_path, dpi=IMAGE_DPI, first_page=page, last_page=page, timeout=timeout)[0]
+    with spans.span("encode"):
+        image_buffer = io.BytesIO()
+        image.save(image_buffer, IMAGE_FILE_EXTENSION)
+        image_bytes = image_buffer.getvalue()
+        checksum = hashlib.sha256(image_bytes).hexdigest()
+    filename = IMAGE_FILENAME_FORMAT.format(page - 1)
+    with spans.span("store"):
+        store_page(image_bytes, checksum, IMAGE_FILE_EXTENSION, f"{output_path}/{filename}")
+    tile_levels = None
+    if tiled:
+        with spans.span("tiles"):
+            tile_levels = generate_tiles(image, f"{output_path}/{TILES_FOLDER_FORMAT.format(page)}")
+    return PageManifestEntry(
+        page=page,
+        filename=filename,
+        size=len(image_bytes),
+        width=image.width,
+        height=image.height,
+        checksum=checksum,
+        format=IMAGE_FILE_EXTENSION,
+        tile_levels=tile_levels,
+    )
+
+
+def _write_manifest(manifest: ConversionManifest, output_path: str):
+    """
+    Write the manifest of a conversion in the output path, atomically so that readers never see a partial manifest.
+
+    Parameters
+    ----------
+    manifest : ConversionManifest
+        Manifest of the conversion.
+    output_path : str
+        Path where the images of the conversion are saved.
+    """
+
+    manifest_path = f"{output_path}/{MANIFEST_FILENAME}"
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest.to_dict(), f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def rebuild_manifest(id: str, output_path: str) -> T.Optional[ConversionManifest]:
+    """
+    Rebuild the manifest of a conversion completed before the manifests were introduced, from the images saved in the
+    output path, and save it next to them. The size of each image is read from its PNG header, so that the backend does
+    not load PIL.
+
+    Parameters
+    ----------
+    id : str
+        ID of the conversion.
+    output_path : str
+        Path where the images of the conversion are saved.
+
+    Returns
+    -------
+    ConversionManifest, optional
+        Manifest of the conversion, or None if its images are no longer available.
+    """
+
+    pages = []
+    while os.path.isfile(image_path := f"{output_path}/{IMAGE_FILENAME_FORMAT.format(len(pages))}"):
+        with open(image_path, "rb") as f:
+            image_bytes = f.read()
+        pages.append(
+            PageManifestEntry(
+                page=len(pages) + 1,
+                filename=os.path.basename(image_path),
+                size=len(image_bytes),
+                width=int.from_bytes(image_bytes[16:20], "big"),
+                height=int.from_bytes(image_bytes[20:24], "big"),
+                checksum=hashlib.sha256(image_bytes).hexdigest(),
+                format=IMAGE_FILE_EXTENSION,
+            )
+        )
+    if not pages:
+        return None
+    logger.info(f"Rebuilt the manifest of {len(pages)} pages")
+    manifest = ConversionManifest(id=id, page_count=len(pages), pages=pages)
+    _write_manifest(manifest, output_path)
+    return manifest
+
+
+def _discard_page(page_future: Future, output_path: str, keep_profile: bool):
+    """
+    Remove a page rendered for a conversion that failed meanwhile, e.g. that timed out while the page was rendered.
+
+    Parameters
+    ----------
+    page_future : Future
+        Future of the executor rendering the page.
+    output_path : str
+        Path where the images of the conversion are saved.
+    keep_profile : bool
+        Whether to keep the profile folder of the output path.
+    """
+
+    if page_future.cancelled() or page_future.exception() is not None:
+        pages = []
+    else:
+        result = page_future.result()
+        pages = [result[0] if keep_profile else result]
+    _discard_results(output_path, pages, keep_profile)
+
+
+def _discard_results(output_path: str, pages: T.List[PageManifestEntry], keep_profile: bool = False):
+    """
+    Remove the results of a conversion that did not complete: its PDF file, its images and tiles, and the references of
+    its images in the content-addressed store.
+
+    Parameters
+    ----------
+    output_path : str
+        Path where the images of the conversion are saved.
+    pages : List[PageManifestEntry]
+        Manifest entries of the pages converted.
+    keep_profile : bool
+        Whether to keep the profile folder of the output path.
+    """
+
+    if not keep_profile or not os.path.isdir(output_path):
+        shutil.rmtree(output_path, ignore_errors=True)
+    else:
+        with os.scandir(output_path) as entries:
+            for entry in entries:
+                if entry.name == PROFILE_FOLDER:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.remove(entry.path)
+    # A blob is only removed once no page links to it anymore
+    release_blobs([p.checksum for p in pages], IMAGE_FILE_EXTENSION)
+
+
+async def convert_pdf_to_images(
+    sql_client: "SQLClient",
+    conversion: Conversion,
+    file_content: bytes,
+    output_path: str,
+    cancel_event: asyncio.Event,
+    requeue_event: asyncio.Event,
+    executor: Executor,
+    profiled: bool = False,
+):
     """
     Convert a PDF file to images through the pdf2image library, register the conversion in the database, and save the images in the output path.
 
+    The pages are rendered one at a time in the executor, so that a cancellation, requested through the cancel event or
+    by another backend process through the database, interrupts the conversion before the next page and removes the
+    partial results; a conversion cancelled after its last check is not marked as completed or failed, and its results
+    are removed as well. The requeue event interrupts the conversion the same way when the backend shuts down, but puts the
+    conversion back in the queue with its PDF file, to be resumed from the first page. The whole conversion is bounded by
+    the conversion timeout and each page by the page timeout; a conversion exceeding them is marked as failed, together
+    with the reason of the failure, and its partial results are removed, including the page still being rendered once
+    done. Once all the pages are converted, a manifest listing them is saved next to the images and the number of pages
+    is stored in the database.
+
+    A profiled conversion also records the time spent in each step, in the backend and in the workers, the peak memory
+    of the processes, and the cProfile statistics of the workers, saved in the profile folder of the output path unless
+    the conversion is cancelled, even if it failed.
+
     Parameters
     ----------
     sql_client : SQLClient
         SQL client to interact with the database.
-    id : str
-        ID of the conversion.
+    conversion : Conversion
+        Conversion to process.
     file_content : bytes
         Content of the PDF file.
-    filename : str
-        Name of the PDF file.
     output_path : str
         Path to save the images.
+    cancel_event : asyncio.Event
+        Event set when the conversion is cancelled.
+    requeue_event : asyncio.Event
+        Event set when the conversion must be put back in the queue.
+    executor : Executor
+        Executor where the pages are rendered.
+    profiled : bool
+        Whether to profile the conversion.
 
     Raises
     ------
     ProcessException
-        If failed to convert the PDF to images or save the images.
+        If failed to convert the PDF to images or save the images, or if the conversion timed out.
     """
 
     logger.info(f"Converting PDF to images for ID: {conversion.id}")
 
+    loop = asyncio.get_running_loop()
+    conversion_timeout = int(os.getenv(EnvKey.CONVERSION_TIMEOUT_KEY))
+    page_timeout = int(os.getenv(EnvKey.PAGE_TIMEOUT_KEY))
+    status = ConversionStatus.FAILED
+    failure_reason = None
+    page_count = conversion.page_count
+    pages = []
+    page_future: T.Optional[Future] = None
+    profiler = ConversionProfiler(f"{output_path}/{PROFILE_FOLDER}") if profiled else None
+    spans = profiler.spans if profiler else SpanTimer(enabled=False)
     try:
-        try:
+        async with asyncio.timeout(conversion_timeout):
             simulate_process_delay = int(os.getenv(EnvKey.SIMULATE_PROCESS_DELAY_KEY))
             if simulate_process_delay > 0:
                 logger.info(f"Simulating process delay: {simulate_process_delay} seconds")
                 await asyncio.sleep(simulate_process_delay)
-            images = pdf2image.convert_from_bytes(file_content)
-        except Exception as e:
-            status = ConversionStatus.FAILED
-            raise ProcessException(f"Failed to convert PDF to images: {e}", 500)
-        try:
-            os.makedirs(output_path)
-            for i, image in enumerate(images):
-                image.save(f"{output_path}/{IMAGE_FILENAME_FORMAT.format(i)}", IMAGE_FILE_EXTENSION)
-        except Exception as e:
-            status = ConversionStatus.FAILED
-            raise ProcessException(f"Failed to save converted images: {e}", 500)
+            try:
+                with spans.span("read_pdf"):
+                    source_path = save_source(file_content, output_path)
+                    if page_count is None:
+                        page_count = await loop.run_in_executor(executor, _get_page_count, source_path, page_timeout)
+            except Exception as e:
+                raise ProcessException(f"Failed to read PDF: {e!r}", 500)
+            for page in range(1, page_count + 1):
+                # Queried in a thread, so that a slow database does not block the event loop once per page
+                if await asyncio.to_thread(sql_client.conversion_get_status, conversion.id) == ConversionStatus.CANCELLED:
+                    cancel_event.set()
+                if cancel_event.is_set() or requeue_event.is_set():
+                    break
+                page_args = (_convert_page, source_path, page, output_path, page_timeout, conversion.tiled)
+                try:
+                    with spans.span("pages"):
+                        # The future of the executor is kept, since the page still being rendered when the conversion
+                        # times out must be discarded once rendered
+                        if profiler:
+                            page_future = executor.submit(profile_call, profiler.get_stats_path(f"page_{page}"), *page_args)
+                            page_entry, worker_profile = await asyncio.wrap_future(page_future, loop=loop)
+                            profiler.add_worker_profile(worker_profile)
+                        else:
+                            page_future = executor.submit(*page_args)
+                            page_entry = await asyncio.wrap_future(page_future, loop=loop)
+                    pages.append(page_entry)
+                except Exception as e:
+                    raise ProcessException(f"Failed to convert page {page} of the PDF to images: {e!r}", 500)
+        # No await between these checks and the status update, so a cancellation cannot slip in between
+        if cancel_event.is_set():
+            logger.info(f"Conversion cancelled for ID: {conversion.id}")
+            _discard_results(output_path, pages)
+            status = ConversionStatus.CANCELLED
+            return
+        if requeue_event.is_set() and len(pages) < page_count:
+            logger.info(f"Conversion requeued for ID: {conversion.id}")
+            _discard_results(output_path, pages)
+            save_source(file_content, output_path)
+            status = ConversionStatus.QUEUED
+            return
+        os.remove(source_path)
+        with spans.span("manifest"):
+            _write_manifest(ConversionManifest(id=conversion.id, page_count=page_count, pages=pages), output_path)
         status = ConversionStatus.COMPLETED
+    except TimeoutError:
+        failure_reason = f"Conversion timed out after {conversion_timeout} seconds"
+        raise ProcessException(failure_reason, 500)
+    except ProcessException as e:
+        failure_reason = e.message
+        raise
     finally:
-        sql_client.conversion_update_status(conversion.id, status)
+        if status == ConversionStatus.FAILED:
+            _discard_results(output_path, pages, keep_profile=profiled)
+            if page_future is not None and not page_future.done():
+                page_future.add_done_callback(lambda f: _discard_page(f, output_path, profiled))
+        with spans.span("db_update"):
+            updated = sql_client.conversion_update_status(conversion.id, status, failure_reason, page_count)
+        # Cancelled by another backend process after the last check, e.g. while the last page was rendered
+        if not updated and status != ConversionStatus.CANCELLED:
+            logger.info(f"Conversion cancelled meanwhile for ID: {conversion.id}")
+            _discard_results(output_path, pages)
+            status = ConversionStatus.CANCELLED
+        if profiler and status.is_final and status != ConversionStatus.CANCELLED:
+            try:
+                profiler.save(conversion.id)
+            except Exception as e:
+                logger.warning(f"Failed to save the profile for ID: {conversion.id}: {e!r}")
 
     logger.info(f"Conversion completed for ID: {conversion.id}")
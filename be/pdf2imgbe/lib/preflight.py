@@ -0,0 +1,87 @@
+import re
+from http import HTTPStatus
+
+from pdf2imgbe.lib.exception import ProcessException
+from pdf2imgbe.lib.model import PdfPreflight
+from pdf2imgbe.lib.statics import IMAGE_DPI
+
+PDF_HEADER = b"%PDF-"
+PDF_HEADER_MAX_OFFSET = 1024  # The header may be preceded by arbitrary bytes within the first kilobyte
+POINTS_PER_INCH = 72
+# pdfinfo only prints the size of every page, numbered, when given a page range; its pages are 32-bit integers
+PDFINFO_MAX_LAST_PAGE = 2**31 - 1
+PAGE_SIZE_KEY_REGEX = re.compile(r"^Page\s+\d+ size$")
+PAGE_SIZE_VALUE_REGEX = re.compile(r"^([\d.]+) x ([\d.]+) pts")
+
+
+def preflight_pdf(file_content: bytes, timeout: int, max_pages: int, max_estimated_megapixels: float) -> PdfPreflight:
+    """
+    Validate a PDF file and estimate the cost of its conversion before queuing it.
+
+    The header is checked in place, then a single run of poppler's pdfinfo parses the cross-reference table to read the
+    page count, the size of each page and the encryption state, which takes milliseconds even for large files.
+
+    Parameters
+    ----------
+    file_content : bytes
+        Content of the PDF file.
+    timeout : int
+        Maximum time in seconds allowed to read the PDF information.
+    max_pages : int
+        Maximum number of pages accepted; 0 disables the limit.
+    max_estimated_megapixels : float
+        Maximum number of megapixels to render accepted; 0 disables the limit.
+
+    Returns
+    -------
+    PdfPreflight
+        Information on the PDF file.
+
+    Raises
+    ------
+    ProcessException
+        If the file is not a valid PDF, is password protected, or exceeds the limits.
+    """
+
+    # Imported on the first upload, so that the backend starts without loading pdf2image and PIL
+    import pdf2image
+    from pdf2image.exceptions import PDFPageCountError, PDFPopplerTimeoutError
+
+    if PDF_HEADER not in file_content[: PDF_HEADER_MAX_OFFSET + len(PDF_HEADER)]:
+        raise ProcessException("Invalid file. The file is not a PDF.", HTTPStatus.BAD_REQUEST)
+    try:
+        # pdfinfo clamps the last page to the page count, so the limit is enough to get the size of every page
+        info = pdf2image.pdfinfo_from_bytes(
+            file_content, timeout=timeout, first_page=1, last_page=max_pages or PDFINFO_MAX_LAST_PAGE
+        )
+    except PDFPopplerTimeoutError:
+        raise ProcessException("Invalid file. The PDF could not be analyzed in time.", HTTPStatus.BAD_REQUEST)
+    except PDFPageCountError as e:
+        if "password" in str(e).lower():
+            raise ProcessException("Password protected PDF files are not supported.", HTTPStatus.BAD_REQUEST)
+        raise ProcessException("Invalid file. The PDF is corrupted.", HTTPStatus.BAD_REQUEST)
+
+    page_count = info["Pages"]
+    if page_count == 0:
+        raise ProcessException("Invalid file. The PDF has no pages.", HTTPStatus.BAD_REQUEST)
+    if max_pages and page_count > max_pages:
+        raise ProcessException(f"The PDF has {page_count} pages, maximum is {max_pages}.", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+    page_sizes = []
+    for key, value in info.items():
+        match = PAGE_SIZE_VALUE_REGEX.match(str(value))
+        if PAGE_SIZE_KEY_REGEX.match(key) and match:
+            page_sizes.append((float(match.group(1)), float(match.group(2))))
+    estimated_megapixels = sum(w * h for w, h in page_sizes) * (IMAGE_DPI / POINTS_PER_INCH) ** 2 / 1e6
+    if max_estimated_megapixels and estimated_megapixels > max_estimated_megapixels:
+        raise ProcessException(
+            f"The PDF would render {estimated_megapixels:.0f} megapixels, maximum is {max_estimated_megapixels:.0f}.",
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        )
+
+    return PdfPreflight(
+        page_count=page_count,
+        page_sizes=page_sizes,
+        encrypted=str(info.get("Encrypted", "no")).startswith("yes"),
+        estimated_megapixels=round(estimated_megapixels, 2),
+    )
@@ -0,0 +1,213 @@
+import os
+import time
+import json
+import pstats
+import cProfile
+import resource
+import typing as T
+from contextlib import contextmanager
+
+from pdf2imgbe.lib.model import ConversionProfile
+from pdf2imgbe.lib.statics import PROFILE_STATS_FILENAME, PROFILE_SUMMARY_FILENAME, PROFILE_TOP_FUNCTIONS
+
+
+class SpanTimer:
+    """
+    Accumulate the wall-clock time spent in named spans of code; a disabled timer only runs the spans.
+    """
+
+    enabled: bool
+    spans: T.Dict[str, T.Dict[str, T.Union[int, float]]]
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.spans = {}
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Time the code run in the context.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span; the time of spans with the same name is summed.
+        """
+
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        """
+        Add time to a span.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span.
+        seconds : float
+            Time spent in the span.
+        count : int
+            Number of times the span was entered.
+        """
+
+        span = self.spans.setdefault(name, {"seconds": 0.0, "count": 0})
+        span["seconds"] += seconds
+        span["count"] += count
+
+
+def get_peak_memory_mb() -> T.Dict[str, float]:
+    """
+    Get the peak resident memory of the current process and of the largest child process it waited for, such as the
+    poppler processes spawned by pdf2image. Both are high-water marks over the lifetime of the process.
+
+    Returns
+    -------
+    Dict[str, float]
+        Peak resident memory in megabytes of the process and of its children.
+    """
+
+    return {
+        "process": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def profile_call(stats_path: str, function: T.Callable, *args, **kwargs) -> T.Tuple[T.Any, T.Dict[str, T.Any]]:
+    """
+    Run a function under cProfile, save its statistics and time its spans. Meant to run in a worker process, where the
+    profiler only sees the work of the function.
+
+    Parameters
+    ----------
+    stats_path : str
+        Path where the cProfile statistics are saved.
+    function : Callable
+        Function to run; it receives the span timer through the `spans` keyword argument.
+    *args, **kwargs
+        Arguments of the function.
+
+    Returns
+    -------
+    Tuple[Any, Dict[str, Any]]
+        Result of the function, and spans and peak memory of the worker.
+    """
+
+    spans = SpanTimer()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = function(*args, spans=spans, **kwargs)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(stats_path)
+    return result, {"spans": spans.spans, "peak_memory_mb": get_peak_memory_mb()}
+
+
+class ConversionProfiler:
+    """
+    Collect the profile of a conversion: the spans timed in the backend and in the workers, the peak memory of the
+    processes, and the cProfile statistics of the workers, merged when the profile is saved.
+    """
+
+    profile_path: str
+    spans: SpanTimer
+    peak_memory_mb: T.Dict[str, float]
+    _start: float
+    _stats_paths: T.List[str]
+
+    def __init__(self, profile_path: str):
+        self.profile_path = profile_path
+        self.spans = SpanTimer()
+        self.peak_memory_mb = {}
+        self._start = time.perf_counter()
+        self._stats_paths = []
+
+    def get_stats_path(self, name: str) -> str:
+        """
+        Get a path where a worker can save its cProfile statistics, to be merged in the profile.
+
+        Parameters
+        ----------
+        name : str
+            Unique name of the statistics, e.g. the page they refer to.
+
+        Returns
+        -------
+        str
+            Path of the statistics.
+        """
+
+        os.makedirs(self.profile_path, exist_ok=True)
+        stats_path = f"{self.profile_path}/{name}.prof"
+        self._stats_paths.append(stats_path)
+        return stats_path
+
+    def add_worker_profile(self, worker_profile: T.Dict[str, T.Any]):
+        """
+        Add the spans and the peak memory measured by a worker.
+
+        Parameters
+        ----------
+        worker_profile : Dict[str, Any]
+            Spans and peak memory returned by `profile_call`.
+        """
+
+        for name, span in worker_profile["spans"].items():
+            self.spans.add(name, span["seconds"], span["count"])
+        for process, memory in worker_profile["peak_memory_mb"].items():
+            key = "poppler" if process == "children" else "worker"
+            self.peak_memory_mb[key] = max(self.peak_memory_mb.get(key, 0.0), memory)
+
+    def save(self, id: str) -> ConversionProfile:
+        """
+        Merge the cProfile statistics of the workers in a single file, loadable with pstats or snakeviz, and save a
+        summary of the profile next to it.
+
+        Parameters
+        ----------
+        id : str
+            ID of the conversion.
+
+        Returns
+        -------
+        ConversionProfile
+            Summary of the profile.
+        """
+
+        os.makedirs(self.profile_path, exist_ok=True)
+        stats_paths = [p for p in self._stats_paths if os.path.exists(p)]
+        top_functions = []
+        if stats_paths:
+            stats = pstats.Stats(*stats_paths)
+            stats.dump_stats(f"{self.profile_path}/{PROFILE_STATS_FILENAME}")
+            for path in stats_paths:
+                os.remove(path)
+            by_cumulative_time = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for (filename, line, function), function_stats in by_cumulative_time[:PROFILE_TOP_FUNCTIONS]:
+                _, calls, total_time, cumulative_time, _ = function_stats
+                top_functions.append(
+                    {
+                        "function": f"{filename}:{line}({function})",
+                        "calls": calls,
+                        "total_seconds": total_time,
+                        "cumulative_seconds": cumulative_time,
+                    }
+                )
+
+        profile = ConversionProfile(
+            id=id,
+            wall_seconds=time.perf_counter() - self._start,
+            spans=self.spans.spans,
+            peak_memory_mb={"backend": get_peak_memory_mb()["process"], **self.peak_memory_mb},
+            top_functions=top_functions,
+        )
+        with open(f"{self.profile_path}/{PROFILE_SUMMARY_FILENAME}", "w") as f:
+            json.dump(profile.to_dict(), f)
+        return profile
@@ -1,8 +1,28 @@
 from enum import Enum
 
 RESULTS_FOLDER = "results"
+BLOBS_FOLDER = f"{RESULTS_FOLDER}/blobs"
 IMAGE_FILE_EXTENSION = "PNG"
 IMAGE_FILENAME_FORMAT = "Page_{}." + IMAGE_FILE_EXTENSION
+IMAGE_DPI = 200
+TILE_SIZE = 256
+TILE_OVERLAP = 1
+TILE_FILE_EXTENSION = "PNG"
+TILES_FOLDER_FORMAT = "tiles/{}"
+SOURCE_FILENAME = "source.pdf"
+MANIFEST_FILENAME = "manifest.json"
+PROFILE_FOLDER = "profile"
+PROFILE_STATS_FILENAME = "profile.prof"
+PROFILE_SUMMARY_FILENAME = "profile.json"
+PROFILE_TOP_FUNCTIONS = 30
+MAX_BULK_STATUS_IDS = 10000
+MAX_STATS_BUCKETS = 2000
+STATS_DURATION_PERCENTILES = (0.5, 0.95, 0.99)
+REQUEST_ID_HEADER = "X-Request-ID"
+SERVER_HOST = "0.0.0.0"
+SERVER_REQUESTS_SHUTDOWN_TIMEOUT = 30
+DB_CONNECT_TIMEOUT = 5  # Seconds
+PENDING_CONVERSION_CACHE_TTL = 1  # Seconds; bounds how stale the status of a queued or running conversion may be
 
 
 class EnvKey:
@@ -12,6 +32,21 @@ class EnvKey:
 
     SIMULATE_PROCESS_DELAY_KEY = "SIMULATE_PROCESS_DELAY"
     LOG_LEVEL_KEY = "LOG_LEVEL"
+    LOG_SAMPLE_RATE_KEY = "LOG_SAMPLE_RATE"
+    MAX_CONCURRENT_CONVERSIONS_KEY = "MAX_CONCURRENT_CONVERSIONS"
+    CONVERSION_TIMEOUT_KEY = "CONVERSION_TIMEOUT"
+    PAGE_TIMEOUT_KEY = "PAGE_TIMEOUT"
+    WORKER_MEMORY_LIMIT_MB_KEY = "WORKER_MEMORY_LIMIT_MB"
+    CACHE_MAX_SIZE_KEY = "CACHE_MAX_SIZE"
+    CACHE_TTL_KEY = "CACHE_TTL"
+    PREFLIGHT_TIMEOUT_KEY = "PREFLIGHT_TIMEOUT"
+    MAX_PAGES_KEY = "MAX_PAGES"
+    MAX_ESTIMATED_MEGAPIXELS_KEY = "MAX_ESTIMATED_MEGAPIXELS"
+    PROFILE_SAMPLE_RATE_KEY = "PROFILE_SAMPLE_RATE"
+    BE_APP_PORT_KEY = "BE_APP_PORT"
+    SERVER_WORKERS_KEY = "SERVER_WORKERS"
+    DRAIN_TIMEOUT_KEY = "DRAIN_TIMEOUT"
+    RESUME_INTERVAL_KEY = "RESUME_INTERVAL"
 
 
 class ConversionStatus(Enum):
@@ -19,6 +54,34 @@ class ConversionStatus(Enum):
     Conversion status.
     """
 
+    QUEUED = "QUEUED"
     RUNNING = "RUNNING"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+    @property
+    def is_final(self) -> bool:
+        """
+        Whether the status is final, i.e. the conversion will not change anymore.
+        """
+
+        return self in (ConversionStatus.COMPLETED, ConversionStatus.FAILED, ConversionStatus.CANCELLED)
+
+
+class StatsBucket(Enum):
+    """
+    Time bucket of the conversion statistics, named after the fields of the Postgres date_trunc function.
+    """
+
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+    @property
+    def seconds(self) -> int:
+        """
+        Duration of the bucket in seconds.
+        """
+
+        return {StatsBucket.MINUTE: 60, StatsBucket.HOUR: 3600, StatsBucket.DAY: 86400}[self]
@@ -0,0 +1,101 @@
+import os
+import math
+import typing as T
+
+# PIL is only needed by the workers that generate the tiles, not by the backend serving them
+if T.TYPE_CHECKING:
+    from PIL import Image
+
+from pdf2imgbe.lib.statics import TILE_SIZE, TILE_OVERLAP, TILE_FILE_EXTENSION
+
+DZI_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{tile_size}" Overlap="{overlap}" Format="{format}">'
+    '<Size Width="{width}" Height="{height}"/>'
+    "</Image>\n"
+)
+
+
+def get_tile_levels(width: int, height: int) -> int:
+    """
+    Get the number of levels of the Deep Zoom pyramid of an image, from 1x1 pixel to full resolution.
+
+    Parameters
+    ----------
+    width : int
+        Width of the image.
+    height : int
+        Height of the image.
+
+    Returns
+    -------
+    int
+        Number of levels.
+    """
+
+    return math.ceil(math.log2(max(width, height))) + 1
+
+
+def get_dzi_descriptor(width: int, height: int) -> str:
+    """
+    Get the Deep Zoom descriptor of an image.
+
+    Parameters
+    ----------
+    width : int
+        Width of the image.
+    height : int
+        Height of the image.
+
+    Returns
+    -------
+    str
+        DZI XML descriptor.
+    """
+
+    return DZI_TEMPLATE.format(
+        tile_size=TILE_SIZE, overlap=TILE_OVERLAP, format=TILE_FILE_EXTENSION.lower(), width=width, height=height
+    )
+
+
+def generate_tiles(image: "Image.Image", tiles_path: str) -> int:
+    """
+    Generate the Deep Zoom tile pyramid of an image, where each level halves the resolution of the next one and is
+    split in tiles of fixed size, so that viewers can pan and zoom by fetching only the visible tiles.
+
+    The tiles are saved as `{tiles_path}/{level}/{column}_{row}.{format}`, following the DZI layout.
+
+    Parameters
+    ----------
+    image : Image.Image
+        Image to tile.
+    tiles_path : str
+        Folder where the tiles are saved.
+
+    Returns
+    -------
+    int
+        Number of levels of the pyramid.
+    """
+
+    from PIL import Image
+
+    levels = get_tile_levels(image.width, image.height)
+    level_image = image
+    for level in reversed(range(levels)):
+        scale = 2 ** (levels - 1 - level)
+        level_size = (math.ceil(image.width / scale), math.ceil(image.height / scale))
+        if level_image.size != level_size:  # Downscale from the previous level, which is much cheaper than from the source
+            level_image = level_image.resize(level_size, Image.Resampling.LANCZOS)
+        level_path = f"{tiles_path}/{level}"
+        os.makedirs(level_path, exist_ok=True)
+        for column in range(math.ceil(level_size[0] / TILE_SIZE)):
+            for row in range(math.ceil(level_size[1] / TILE_SIZE)):
+                box = (
+                    max(column * TILE_SIZE - TILE_OVERLAP, 0),
+                    max(row * TILE_SIZE - TILE_OVERLAP, 0),
+                    min((column + 1) * TILE_SIZE + TILE_OVERLAP, level_size[0]),
+                    min((row + 1) * TILE_SIZE + TILE_OVERLAP, level_size[1]),
+                )
+                level_image.crop(box).save(f"{level_path}/{column}_{row}.{TILE_FILE_EXTENSION.lower()}", TILE_FILE_EXTENSION)
+    return levels
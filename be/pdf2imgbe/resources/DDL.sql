@@ -1,6 +1,18 @@
+CREATE TYPE conversion_status AS ENUM ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED');
+
 CREATE TABLE conversion (
-    id VARCHAR(255) PRIMARY KEY,
+    id UUID PRIMARY KEY,
     filename VARCHAR(255) NOT NULL,
-    status VARCHAR(50) NOT NULL,
-    start_date TIMESTAMP NOT NULL
+    status conversion_status NOT NULL,
+    start_date TIMESTAMP NOT NULL,
+    update_date TIMESTAMP NOT NULL,
+    end_date TIMESTAMP,
+    duration_seconds DOUBLE PRECISION GENERATED ALWAYS AS (EXTRACT(EPOCH FROM end_date - start_date)) STORED,
+    failure_reason TEXT,
+    page_count INTEGER,
+    estimated_megapixels REAL,
+    tiled BOOLEAN NOT NULL DEFAULT FALSE
 );
+
+CREATE INDEX conversion_status_start_date_idx ON conversion (status, start_date);
+CREATE INDEX conversion_end_date_idx ON conversion (end_date);
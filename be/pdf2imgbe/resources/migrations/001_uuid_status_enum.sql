@@ -0,0 +1,34 @@
+-- Migrate a conversion table created before the native UUID and enum types to the current DDL, from the original table
+-- with only the id, filename, status and start_date columns or from a later one with some of the other columns.
+-- The column type changes rewrite the table once, so run it during a maintenance window on large tables.
+
+BEGIN;
+
+ALTER TABLE conversion
+    ADD COLUMN IF NOT EXISTS update_date TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS failure_reason TEXT,
+    ADD COLUMN IF NOT EXISTS page_count INTEGER,
+    ADD COLUMN IF NOT EXISTS estimated_megapixels REAL,
+    ADD COLUMN IF NOT EXISTS tiled BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- The conversions created before the update date was tracked were last updated, at the earliest, when they started
+UPDATE conversion SET update_date = start_date WHERE update_date IS NULL;
+
+ALTER TABLE conversion ALTER COLUMN update_date SET NOT NULL;
+
+CREATE TYPE conversion_status AS ENUM ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED');
+
+ALTER TABLE conversion
+    ALTER COLUMN id TYPE UUID USING id::UUID,
+    ALTER COLUMN status TYPE conversion_status USING status::conversion_status,
+    ADD COLUMN end_date TIMESTAMP;
+
+-- The last update of a finished conversion is its completion
+UPDATE conversion SET end_date = update_date WHERE status IN ('COMPLETED', 'FAILED', 'CANCELLED');
+
+ALTER TABLE conversion
+    ADD COLUMN duration_seconds DOUBLE PRECISION GENERATED ALWAYS AS (EXTRACT(EPOCH FROM end_date - start_date)) STORED;
+
+CREATE INDEX conversion_status_start_date_idx ON conversion (status, start_date);
+
+COMMIT;
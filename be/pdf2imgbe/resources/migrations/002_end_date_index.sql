@@ -0,0 +1,4 @@
+-- Index the completion date of the conversions, scanned by the throughput and duration statistics.
+-- CONCURRENTLY does not block the writes of the running backend, and cannot run inside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS conversion_end_date_idx ON conversion (end_date);
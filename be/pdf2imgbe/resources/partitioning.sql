@@ -0,0 +1,49 @@
+-- Optional replacement of the conversion table of DDL.sql, partitioned by month of start_date, for deployments that
+-- retain conversions only for a limited period: dropping an expired partition is a cheap metadata operation, while
+-- deleting its rows would scan the table and leave it bloated.
+--
+-- The primary key of a partitioned table must include the partition key, so the uniqueness of the id alone relies on
+-- uuid4, and lookups by id probe the index of every partition: keep the number of partitions bounded by the retention.
+--
+-- Retention, e.g. to drop January 2026:
+--     DROP TABLE conversion_y2026m01;
+
+CREATE TYPE conversion_status AS ENUM ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED');
+
+CREATE TABLE conversion (
+    id UUID NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    status conversion_status NOT NULL,
+    start_date TIMESTAMP NOT NULL,
+    update_date TIMESTAMP NOT NULL,
+    end_date TIMESTAMP,
+    duration_seconds DOUBLE PRECISION GENERATED ALWAYS AS (EXTRACT(EPOCH FROM end_date - start_date)) STORED,
+    failure_reason TEXT,
+    page_count INTEGER,
+    estimated_megapixels REAL,
+    tiled BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (id, start_date)
+) PARTITION BY RANGE (start_date);
+
+CREATE INDEX conversion_status_start_date_idx ON conversion (status, start_date);
+CREATE INDEX conversion_end_date_idx ON conversion (end_date);
+
+-- Catches the rows outside of the created partitions, so that inserts never fail
+CREATE TABLE conversion_default PARTITION OF conversion DEFAULT;
+
+-- Create the partition of the month of the provided date, if missing; schedule it ahead of each month, e.g. via cron
+CREATE FUNCTION conversion_create_partition(month DATE) RETURNS VOID AS $$
+DECLARE
+    month_start DATE := date_trunc('month', month);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF conversion FOR VALUES FROM (%L) TO (%L)',
+        'conversion_' || to_char(month_start, '"y"YYYY"m"MM'),
+        month_start,
+        month_start + INTERVAL '1 month'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT conversion_create_partition(CURRENT_DATE);
+SELECT conversion_create_partition((CURRENT_DATE + INTERVAL '1 month')::DATE);
@@ -0,0 +1,41 @@
+"""
+Production entry point of the backend: serve the app with several worker processes, each draining its conversions on
+shutdown.
+
+On SIGTERM or SIGINT every worker stops accepting connections, waits for the requests being served, then drains its
+scheduler: the queued conversions and those still running after the drain timeout are requeued, to be resumed by the
+next backend started. The process manager must therefore allow the drain timeout plus the page timeout before killing
+the backend.
+
+Usage, from the be folder:
+    python -m pdf2imgbe.server --workers 4
+"""
+
+import os
+import argparse
+import uvicorn
+
+from pdf2imgbe.lib.statics import EnvKey, SERVER_HOST, SERVER_REQUESTS_SHUTDOWN_TIMEOUT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the PDF2IMG backend.")
+    parser.add_argument("--host", default=SERVER_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=int(os.getenv(EnvKey.BE_APP_PORT_KEY)), help="Port to bind")
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv(EnvKey.SERVER_WORKERS_KEY)), help="Number of worker processes"
+    )
+    args = parser.parse_args()
+
+    # The app is passed by import string, so that each worker process imports its own instance
+    uvicorn.run(
+        "pdf2imgbe.app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=SERVER_REQUESTS_SHUTDOWN_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
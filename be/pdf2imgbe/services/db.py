@@ -1,33 +1,116 @@
 from pdf2imgbe.lib.log import logger
 
 import os
+import threading
 import typing as T
+from contextlib import contextmanager
+from uuid import UUID
+from datetime import datetime
 from psycopg2 import connect, OperationalError
 
-from pdf2imgbe.lib.statics import ConversionStatus
-from pdf2imgbe.lib.model import Conversion
+from pdf2imgbe.lib.cache import TTLCache
+from pdf2imgbe.lib.statics import (
+    EnvKey,
+    ConversionStatus,
+    StatsBucket,
+    STATS_DURATION_PERCENTILES,
+    DB_CONNECT_TIMEOUT,
+    PENDING_CONVERSION_CACHE_TTL,
+)
+from pdf2imgbe.lib.model import Conversion, ConversionStats, ThroughputBucket
 
 
 class SQLClient:
     """
     SQL client to interact with the database.
+
+    The finished conversions fetched by ID are kept in a bounded cache, so that repeated polls do not require a round
+    trip to the database. The conversions still queued or running are only cached for a second: several backend
+    processes may serve the same conversion, and the invalidation of a status update only reaches the cache of the
+    process that made it, so their status seen by the polls is at most a second stale, while the polls of many clients
+    within that second share a single query.
+
+    Every query runs in its own transaction, rolled back if the query fails, so that a failed query does not leave the
+    connection, shared by the whole backend process, in an aborted transaction. The identifiers are converted to the
+    canonical form of the UUIDs beforehand, since Python accepts forms of UUIDs that the database rejects.
+
+    The queries list their columns explicitly, so that they do not depend on the physical order of the columns and do
+    not fetch the ones added later by default.
     """
 
     _sql_connection: object
+    _transaction_lock: threading.Lock
+    _conversion_cache: TTLCache
+    _pending_conversion_cache: TTLCache
     TABLE_NAME = "conversion"
+    COLUMNS = (
+        "id, filename, status, start_date, update_date, end_date, duration_seconds, failure_reason, page_count, "
+        "estimated_megapixels, tiled"
+    )
 
     def __init__(self):
-        try:
-            self._sql_connection = connect(
-                dbname=os.environ["DB_NAME"],
-                user=os.environ["DB_USER"],
-                password=os.environ["DB_PASSWORD"],
-                host=os.environ["DB_SERVICE_HOST"],
-                port=os.environ["DB_SERVICE_PORT"],
-            )
-            logger.info("Database connection established successfully.")
-        except OperationalError as e:
-            logger.info(f"Failed to connect to the database: {e}")
+        self._conversion_cache = TTLCache(int(os.getenv(EnvKey.CACHE_MAX_SIZE_KEY)), int(os.getenv(EnvKey.CACHE_TTL_KEY)))
+        self._pending_conversion_cache = TTLCache(int(os.getenv(EnvKey.CACHE_MAX_SIZE_KEY)), PENDING_CONVERSION_CACHE_TTL)
+        self._sql_connection = None
+        self._transaction_lock = threading.Lock()
+
+    @property
+    def _connection(self):
+        """
+        Connection to the database, established on first use rather than when the client is created, so that the backend
+        starts without waiting for the database; a connection that failed or was closed is established again. Connecting
+        gives up after a timeout, so that an unreachable database fails the requests instead of hanging them.
+        """
+
+        if self._sql_connection is None or self._sql_connection.closed:
+            try:
+                self._sql_connection = connect(
+                    dbname=os.environ["DB_NAME"],
+                    user=os.environ["DB_USER"],
+                    password=os.environ["DB_PASSWORD"],
+                    host=os.environ["DB_SERVICE_HOST"],
+                    port=os.environ["DB_SERVICE_PORT"],
+                    connect_timeout=DB_CONNECT_TIMEOUT,
+                )
+                logger.info("Database connection established successfully.")
+            except OperationalError as e:
+                logger.error(f"Failed to connect to the database: {e}")
+                raise
+        return self._sql_connection
+
+    @contextmanager
+    def _cursor(self):
+        """
+        Cursor of a transaction on the connection, committed once the cursor is closed, or rolled back if a query fails.
+        The transactions are serialized, since some queries run in threads and a connection has one transaction at a
+        time: a rollback would otherwise discard the queries of another thread.
+
+        Yields
+        ------
+        cursor
+            Cursor of the transaction.
+        """
+
+        with self._transaction_lock:
+            connection = self._connection
+            try:
+                with connection.cursor() as cursor:
+                    yield cursor
+                connection.commit()
+            except Exception:
+                if not connection.closed:
+                    connection.rollback()
+                raise
+
+    def close(self):
+        """
+        Close the connection to the database, if established.
+        """
+
+        if self._sql_connection is not None:
+            logger.info("Closing the database connection")
+            self._sql_connection.close()
+            self._sql_connection = None
 
     def conversion_get_all(self) -> T.List[Conversion]:
         """
@@ -40,8 +123,8 @@ class SQLClient:
         """
 
         logger.info("Fetching all conversions")
-        with self._sql_connection.cursor() as cursor:
-            cursor.execute(f"SELECT * FROM {self.TABLE_NAME}")
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT {self.COLUMNS} FROM {self.TABLE_NAME}")
             conversions = cursor.fetchall()
             col_names = [desc[0] for desc in cursor.description]
             return [Conversion.from_dict(dict(zip(col_names, c))) for c in conversions]
@@ -57,12 +140,22 @@ class SQLClient:
         """
 
         logger.info(f"Creating conversion record for ID: {conversion.id}")
-        with self._sql_connection.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(
-                f"INSERT INTO {self.TABLE_NAME} (id, filename, status, start_date) VALUES (%s, %s, %s, %s)",
-                (conversion.id, conversion.filename, conversion.status.value, conversion.start_date),
+                f"INSERT INTO {self.TABLE_NAME} "
+                "(id, filename, status, start_date, update_date, page_count, estimated_megapixels, tiled) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                (
+                    conversion.id,
+                    conversion.filename,
+                    conversion.status.value,
+                    conversion.start_date,
+                    conversion.update_date or conversion.start_date,
+                    conversion.page_count,
+                    conversion.estimated_megapixels,
+                    conversion.tiled,
+                ),
             )
-            self._sql_connection.commit()
 
     def conversion_get_by_id(self, id: str) -> Conversion:
         """
@@ -76,19 +169,173 @@ class SQLClient:
         Returns
         -------
         Conversion
-            Status of the conversion.
+            Status of the conversion, or None if the identifier is malformed or unknown.
         """
 
-        logger.info(f"Fetching conversion for ID: {id}")
-        with self._sql_connection.cursor() as cursor:
-            cursor.execute(f"SELECT * FROM {self.TABLE_NAME} WHERE id = %s", (id,))
-            conversion = cursor.fetchone()
+        id = canonical_uuid(id)
+        if id is None:
+            return None
+        cached_conversion = self._conversion_cache.get(id) or self._pending_conversion_cache.get(id)
+        if cached_conversion is not None:
+            return cached_conversion.model_copy()
+
+        logger.info(f"Fetching conversion for ID: {id}", extra={"sampled": True})
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT {self.COLUMNS} FROM {self.TABLE_NAME} WHERE id = %s", (id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            col_names = [desc[0] for desc in cursor.description]
+            conversion = Conversion.from_dict(dict(zip(col_names, row)))
+        self._cache_conversion(conversion)
+        return conversion
+
+    def conversion_get_by_ids(self, ids: T.List[str], changed_since: T.Optional[datetime] = None) -> T.List[Conversion]:
+        """
+        Get many conversions by their unique identifiers with a single query.
+
+        Parameters
+        ----------
+        ids : List[str]
+            Unique identifiers of the conversions.
+        changed_since : datetime, optional
+            If provided, only the conversions updated after this date are returned.
+
+        Returns
+        -------
+        List[Conversion]
+            Conversions found; unknown and malformed identifiers are omitted.
+        """
+
+        logger.info(f"Fetching {len(ids)} conversions", extra={"sampled": True})
+        # A malformed identifier would fail the cast of the whole array
+        ids = [id for id in map(canonical_uuid, ids) if id is not None]
+        if not ids:
+            return []
+        query = f"SELECT {self.COLUMNS} FROM {self.TABLE_NAME} WHERE id = ANY(%s::UUID[])"
+        params = [ids]
+        if changed_since is not None:
+            query += " AND update_date > %s"
+            params.append(changed_since)
+        with self._cursor() as cursor:
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
             col_names = [desc[0] for desc in cursor.description]
-            return Conversion.from_dict(dict(zip(col_names, conversion)))
+            conversions = [Conversion.from_dict(dict(zip(col_names, r))) for r in rows]
+        for conversion in conversions:
+            self._cache_conversion(conversion)
+        return conversions
 
-    def conversion_update_status(self, id: str, status: ConversionStatus):
+    def conversion_get_by_status(self, status: ConversionStatus) -> T.List[Conversion]:
         """
-        Update the status of a conversion.
+        Get the conversions with a status, oldest first, through the (status, start_date) index.
+
+        Parameters
+        ----------
+        status : ConversionStatus
+            Status of the conversions.
+
+        Returns
+        -------
+        List[Conversion]
+            Conversions with the status.
+        """
+
+        logger.info(f"Fetching conversions with status {status}")
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT {self.COLUMNS} FROM {self.TABLE_NAME} WHERE status = %s ORDER BY start_date", (status.value,))
+            rows = cursor.fetchall()
+            col_names = [desc[0] for desc in cursor.description]
+            return [Conversion.from_dict(dict(zip(col_names, r))) for r in rows]
+
+    def conversion_get_status(self, id: str) -> T.Optional[ConversionStatus]:
+        """
+        Get the current status of a conversion from the database, bypassing the cache.
+
+        Parameters
+        ----------
+        id : str
+            Unique identifier of the conversion.
+
+        Returns
+        -------
+        ConversionStatus, optional
+            Status of the conversion, or None if not found.
+        """
+
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT status FROM {self.TABLE_NAME} WHERE id = %s", (id,))
+            row = cursor.fetchone()
+        return ConversionStatus(row[0]) if row else None
+
+    def conversion_start(self, id: str) -> bool:
+        """
+        Mark a queued conversion as running, atomically, so that a conversion cancelled meanwhile or claimed by another
+        backend process is not started.
+
+        Parameters
+        ----------
+        id : str
+            Unique identifier of the conversion.
+
+        Returns
+        -------
+        bool
+            True if the conversion was queued and is now running, False otherwise.
+        """
+
+        logger.info(f"Starting conversion for ID: {id}")
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self.TABLE_NAME} SET status = %s, update_date = %s WHERE id = %s AND status = %s",
+                (ConversionStatus.RUNNING.value, datetime.now(), id, ConversionStatus.QUEUED.value),
+            )
+            started = cursor.rowcount == 1
+        self._invalidate_conversion(id)
+        return started
+
+    def conversion_cancel(self, id: str) -> T.Optional[ConversionStatus]:
+        """
+        Mark a queued or running conversion as cancelled, atomically, so that a conversion finishing meanwhile is not
+        marked as cancelled after its completion.
+
+        Parameters
+        ----------
+        id : str
+            Unique identifier of the conversion.
+
+        Returns
+        -------
+        ConversionStatus, optional
+            Status of the conversion before it was cancelled, or None if it was not queued nor running.
+        """
+
+        logger.info(f"Cancelling conversion for ID: {id}")
+        update_date = datetime.now()
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self.TABLE_NAME} c SET status = %s, update_date = %s, end_date = %s "
+                f"FROM (SELECT id, status FROM {self.TABLE_NAME} WHERE id = %s FOR UPDATE) previous "
+                "WHERE c.id = previous.id AND previous.status IN (%s, %s) RETURNING previous.status",
+                (
+                    ConversionStatus.CANCELLED.value,
+                    update_date,
+                    update_date,
+                    id,
+                    ConversionStatus.QUEUED.value,
+                    ConversionStatus.RUNNING.value,
+                ),
+            )
+            row = cursor.fetchone()
+        self._invalidate_conversion(id)
+        return ConversionStatus(row[0]) if row else None
+
+    def conversion_update_status(
+        self, id: str, status: ConversionStatus, failure_reason: T.Optional[str] = None, page_count: T.Optional[int] = None
+    ) -> bool:
+        """
+        Update the status of a conversion, unless it was cancelled meanwhile, e.g. by another backend process while its
+        last page was rendered; a final status also sets its completion date.
 
         Parameters
         ----------
@@ -96,9 +343,140 @@ class SQLClient:
             Unique identifier of the conversion.
         status : ConversionStatus
             New status of the conversion.
+        failure_reason : str, optional
+            Reason of the failure, if the conversion failed.
+        page_count : int, optional
+            Number of pages of the conversion; the stored value is kept if not provided.
+
+        Returns
+        -------
+        bool
+            True if the status was updated, False if the conversion was cancelled.
         """
 
         logger.info(f"Updating status for ID: {id} to {status}")
-        with self._sql_connection.cursor() as cursor:
-            cursor.execute(f"UPDATE {self.TABLE_NAME} SET status = %s WHERE id = %s", (status.value, id))
-            self._sql_connection.commit()
+        update_date = datetime.now()
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self.TABLE_NAME} SET status = %s, update_date = %s, end_date = %s, failure_reason = %s, "
+                "page_count = COALESCE(%s, page_count) WHERE id = %s AND status <> %s",
+                (
+                    status.value,
+                    update_date,
+                    update_date if status.is_final else None,
+                    failure_reason,
+                    page_count,
+                    id,
+                    ConversionStatus.CANCELLED.value,
+                ),
+            )
+            updated = cursor.rowcount == 1
+        self._invalidate_conversion(id)
+        return updated
+
+    def conversion_get_stats(self, since: datetime, bucket: StatsBucket) -> ConversionStats:
+        """
+        Get the aggregated statistics of the conversions since a date, computed by the database so that only the
+        aggregates are transferred.
+
+        The counts by status rely on one range scan of the (status, start_date) index per status, and the throughput and
+        the durations on a range scan of the end_date index, so that the cost depends on the size of the window rather
+        than on the size of the table.
+
+        Parameters
+        ----------
+        since : datetime
+            Start of the window of the statistics.
+        bucket : StatsBucket
+            Time bucket of the throughput.
+
+        Returns
+        -------
+        ConversionStats
+            Counts by status of the conversions started in the window, counts by final status of the conversions
+            finished in each bucket, where the buckets without finished conversions are omitted, and percentiles in
+            seconds of the duration of the conversions completed in the window.
+        """
+
+        logger.info(f"Fetching conversion stats since {since} by {bucket.value}")
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"SELECT s.status, (SELECT COUNT(*) FROM {self.TABLE_NAME} c WHERE c.status = s.status AND c.start_date >= %s) "
+                "FROM unnest(enum_range(NULL::conversion_status)) AS s(status)",
+                (since,),
+            )
+            status_counts = {status: count for status, count in cursor.fetchall()}
+            cursor.execute(
+                f"SELECT date_trunc(%s, end_date) AS bucket_start, status, COUNT(*) FROM {self.TABLE_NAME} "
+                "WHERE end_date >= %s GROUP BY bucket_start, status ORDER BY bucket_start",
+                (bucket.value, since),
+            )
+            throughput = []
+            for bucket_start, status, count in cursor.fetchall():
+                if not throughput or throughput[-1].start_date != bucket_start:
+                    throughput.append(ThroughputBucket(start_date=bucket_start, status_counts={}))
+                throughput[-1].status_counts[status] = count
+            cursor.execute(
+                "SELECT percentile_cont(%s::DOUBLE PRECISION[]) WITHIN GROUP (ORDER BY duration_seconds) "
+                f"FROM {self.TABLE_NAME} WHERE end_date >= %s AND status = %s",
+                (list(STATS_DURATION_PERCENTILES), since, ConversionStatus.COMPLETED.value),
+            )
+            durations = cursor.fetchone()[0] or [None] * len(STATS_DURATION_PERCENTILES)
+        return ConversionStats(
+            since=since,
+            bucket=bucket,
+            status_counts=status_counts,
+            throughput=throughput,
+            duration_percentiles={f"p{round(p * 100)}": d for p, d in zip(STATS_DURATION_PERCENTILES, durations)},
+        )
+
+    def _cache_conversion(self, conversion: Conversion):
+        """
+        Cache a conversion: until it expires if it is finished, since a finished conversion does not change anymore, and
+        for a second otherwise.
+
+        Parameters
+        ----------
+        conversion : Conversion
+            Conversion to cache.
+        """
+
+        if conversion.status.is_final:
+            self._conversion_cache.set(conversion.id, conversion.model_copy())
+        else:
+            self._pending_conversion_cache.set(conversion.id, conversion.model_copy())
+
+    def _invalidate_conversion(self, id: str):
+        """
+        Remove a conversion from the caches after changing it.
+
+        Parameters
+        ----------
+        id : str
+            Unique identifier of the conversion.
+        """
+
+        self._conversion_cache.invalidate(id)
+        self._pending_conversion_cache.invalidate(id)
+
+
+def canonical_uuid(value: str) -> T.Optional[str]:
+    """
+    Get the canonical form of a UUID, e.g. lower case and without braces or URN prefix, in which the identifiers of the
+    conversions are stored in the database and name their results folder.
+
+    Parameters
+    ----------
+    value : str
+        String to convert.
+
+    Returns
+    -------
+    str, optional
+        Canonical form of the UUID, or None if the string is not a valid UUID.
+    """
+
+    try:
+        return str(UUID(value))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,254 @@
+from pdf2imgbe.lib.log import logger, conversion_id_var
+
+import asyncio
+import typing as T
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf2imgbe.services.db import SQLClient
+from pdf2imgbe.lib.model import Conversion
+from pdf2imgbe.lib.statics import ConversionStatus, RESULTS_FOLDER, SOURCE_FILENAME
+from pdf2imgbe.lib.pdf_converter import convert_pdf_to_images, limit_worker_resources, save_source
+
+
+class ConversionScheduler:
+    """
+    Scheduler that queues the conversions, runs them with a bounded concurrency and allows them to be cancelled.
+
+    The pages are rendered in a pool of worker processes whose memory is limited, so that a pathological PDF cannot take
+    down the backend.
+
+    On shutdown the scheduler drains: it puts the queued conversions back in the queue of the database with their PDF
+    file, and lets the running ones finish within a timeout before requeuing them as well. The requeued conversions are
+    resumed by the other backend processes sharing the results folder; since every conversion is claimed in the database
+    before running, several backend processes can resume them safely.
+    """
+
+    _sql_client: SQLClient
+    _max_concurrent_conversions: int
+    _worker_memory_limit_mb: int
+    _executor: ProcessPoolExecutor
+    _semaphore: asyncio.Semaphore
+    _tasks: T.Dict[str, asyncio.Task]
+    _cancel_events: T.Dict[str, asyncio.Event]
+    _running_ids: T.Set[str]
+    _draining: bool
+    _requeue_event: asyncio.Event
+
+    def __init__(self, sql_client: SQLClient, max_concurrent_conversions: int, worker_memory_limit_mb: int):
+        self._sql_client = sql_client
+        self._max_concurrent_conversions = max_concurrent_conversions
+        self._worker_memory_limit_mb = worker_memory_limit_mb
+        self._executor = self._create_executor()
+        self._semaphore = asyncio.Semaphore(max_concurrent_conversions)
+        self._tasks = {}
+        self._cancel_events = {}
+        self._running_ids = set()
+        self._draining = False
+        self._requeue_event = asyncio.Event()
+
+    def submit(self, conversion: Conversion, file_content: bytes, output_path: str, profiled: bool = False):
+        """
+        Queue a conversion to be processed as soon as a slot is available.
+
+        Parameters
+        ----------
+        conversion : Conversion
+            Conversion to process.
+        file_content : bytes
+            Content of the PDF file.
+        output_path : str
+            Path to save the images.
+        profiled : bool
+            Whether to profile the conversion.
+        """
+
+        logger.info(f"Queueing conversion for ID: {conversion.id}")
+        self._cancel_events[conversion.id] = asyncio.Event()
+        self._tasks[conversion.id] = asyncio.create_task(self._run(conversion, file_content, output_path, profiled))
+        self._tasks[conversion.id].add_done_callback(lambda _: self._forget(conversion.id))
+
+    def cancel(self, id: str) -> bool:
+        """
+        Cancel a conversion: a queued conversion is removed from the queue, while a running conversion is interrupted
+        before rendering its next page.
+
+        Parameters
+        ----------
+        id : str
+            ID of the conversion.
+
+        Returns
+        -------
+        bool
+            True if the conversion was queued or running in this scheduler, False otherwise.
+        """
+
+        if id not in self._tasks:
+            return False
+        logger.info(f"Cancelling conversion for ID: {id}")
+        self._cancel_events[id].set()
+        if id not in self._running_ids:
+            self._tasks[id].cancel()
+        return True
+
+    async def resume(self) -> int:
+        """
+        Queue the conversions requeued by a backend process that shut down, i.e. the queued conversions whose PDF file
+        was saved in the results folder. The conversions still queued in a running backend process have no PDF file
+        saved yet, and a conversion resumed by several processes is only run by the one that claims it first.
+
+        The conversions and their PDF files are read in a thread, so that a slow database or disk does not block the
+        event loop.
+
+        Returns
+        -------
+        int
+            Number of conversions queued.
+        """
+
+        if self._draining:
+            return 0
+        resumed = 0
+        conversions = await asyncio.to_thread(self._sql_client.conversion_get_by_status, ConversionStatus.QUEUED)
+        for conversion in conversions:
+            if conversion.id in self._tasks:
+                continue
+            output_path = f"{RESULTS_FOLDER}/{conversion.id}"
+            file_content = await asyncio.to_thread(_read_source, output_path)
+            # The conversion may have been resumed by a concurrent call, or the scheduler drained, meanwhile
+            if file_content is None or conversion.id in self._tasks or self._draining:
+                continue
+            self.submit(conversion, file_content, output_path)
+            resumed += 1
+        logger.info(f"Resumed {resumed} requeued conversions")
+        return resumed
+
+    async def drain(self, timeout: float):
+        """
+        Shut the scheduler down: stop resuming conversions, requeue the queued ones, wait for the running ones to finish
+        and requeue those still running after the timeout, before their next page.
+
+        Parameters
+        ----------
+        timeout : float
+            Maximum time in seconds to wait for the running conversions to finish.
+        """
+
+        self._draining = True
+        tasks = list(self._tasks.values())
+        running_tasks = [self._tasks[id] for id in self._running_ids]
+        queued_count = len(tasks) - len(running_tasks)
+        logger.info(f"Draining the scheduler: {len(running_tasks)} running and {queued_count} queued conversions")
+        if running_tasks:
+            _, pending = await asyncio.wait(running_tasks, timeout=timeout)
+            if pending:
+                logger.warning(f"Requeuing {len(pending)} conversions still running after {timeout} seconds")
+                self._requeue_event.set()
+        # The queued conversions requeue themselves as soon as they get a slot
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._executor.shutdown()
+
+    async def _run(self, conversion: Conversion, file_content: bytes, output_path: str, profiled: bool):
+        """
+        Wait for a free slot and process the conversion.
+
+        Parameters
+        ----------
+        conversion : Conversion
+            Conversion to process.
+        file_content : bytes
+            Content of the PDF file.
+        output_path : str
+            Path to save the images.
+        profiled : bool
+            Whether to profile the conversion.
+        """
+
+        # The task runs in a copy of the context of the submitter, which has no conversion ID when resuming conversions
+        conversion_id_var.set(conversion.id)
+        executor = None
+        try:
+            async with self._semaphore:
+                if self._draining:
+                    save_source(file_content, output_path)
+                    logger.info(f"Conversion requeued for ID: {conversion.id}")
+                    return
+                # Running from the claim on, so that a drain starting meanwhile waits for the conversion or requeues it
+                self._running_ids.add(conversion.id)
+                if not await asyncio.to_thread(self._sql_client.conversion_start, conversion.id):
+                    logger.info(f"Conversion already started or cancelled for ID: {conversion.id}")
+                    return
+                executor = self._executor
+                await convert_pdf_to_images(
+                    self._sql_client,
+                    conversion,
+                    file_content,
+                    output_path,
+                    self._cancel_events[conversion.id],
+                    self._requeue_event,
+                    executor,
+                    profiled,
+                )
+        except asyncio.CancelledError:
+            logger.info(f"Conversion removed from the queue for ID: {conversion.id}")
+        except Exception as e:
+            logger.error(f"Conversion failed for ID: {conversion.id}: {e}")
+            # A worker process died, e.g. killed by the OOM killer: replace the pool unless another conversion already did
+            if isinstance(e.__context__, BrokenProcessPool) and self._executor is executor:
+                logger.warning("Worker pool is broken; creating a new one")
+                self._executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """
+        Create the pool of worker processes that render the pages.
+
+        Returns
+        -------
+        ProcessPoolExecutor
+            Pool of worker processes.
+        """
+
+        return ProcessPoolExecutor(
+            max_workers=self._max_concurrent_conversions,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=limit_worker_resources,
+            initargs=(self._worker_memory_limit_mb,),
+        )
+
+    def _forget(self, id: str):
+        """
+        Remove a finished, failed or cancelled conversion from the scheduler.
+
+        Parameters
+        ----------
+        id : str
+            ID of the conversion.
+        """
+
+        self._running_ids.discard(id)
+        self._cancel_events.pop(id, None)
+        self._tasks.pop(id, None)
+
+
+def _read_source(output_path: str) -> T.Optional[bytes]:
+    """
+    Read the PDF file saved for a requeued conversion.
+
+    Parameters
+    ----------
+    output_path : str
+        Path where the images of the conversion are saved.
+
+    Returns
+    -------
+    bytes, optional
+        Content of the PDF file, or None if the conversion has no PDF file saved.
+    """
+
+    try:
+        with open(f"{output_path}/{SOURCE_FILENAME}", "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
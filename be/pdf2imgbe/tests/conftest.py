@@ -4,15 +4,34 @@ from dotenv import load_dotenv
 dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../.env.local"))
 load_dotenv(dotenv_path, override=True)
 
+import time
 import pytest
+import hashlib
 import datetime
 from unittest.mock import patch, MagicMock
 from pdf2imgbe.services.db import SQLClient
+from pdf2imgbe.lib.blob_store import store_page
+from pdf2imgbe.lib.model import PageManifestEntry
+
+PAGE_SECONDS = 0.05
+
+
+def convert_page_stub(source_path, page, output_path, timeout, tiled, spans=None):
+    """Render a page after a short delay, storing it like the real converter"""
+    time.sleep(PAGE_SECONDS)
+    image_bytes = f"page {page}".encode()
+    checksum = hashlib.sha256(image_bytes).hexdigest()
+    filename = f"Page_{page - 1}.PNG"
+    store_page(image_bytes, checksum, "PNG", f"{output_path}/{filename}")
+    return PageManifestEntry(
+        page=page, filename=filename, size=len(image_bytes), width=1, height=1, checksum=checksum, format="PNG"
+    )
 
 
 @pytest.fixture
 def mock_sql_connection():
     mock_conn = MagicMock()
+    mock_conn.closed = 0
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
     return mock_conn, mock_cursor
@@ -23,19 +42,27 @@ def sql_client(mock_sql_connection):
     mock_conn, _ = mock_sql_connection
     with patch("pdf2imgbe.services.db.connect", return_value=mock_conn):
         client = SQLClient()
-        return client
+        yield client
 
 
 @pytest.fixture
 def sample_conversions():
     now = datetime.datetime.now()
     return [
-        {"id": "123", "filename": "test1.pdf", "status": "RUNNING", "start_date": now},
-        {"id": "456", "filename": "test2.pdf", "status": "COMPLETED", "start_date": now},
+        {"id": "3f2c5a1e-8b4d-4c6e-9a7f-0d1b2c3e4f50", "filename": "test1.pdf", "status": "RUNNING", "start_date": now},
+        {"id": "7a9e1c3d-5f2b-4d8a-b6c4-e0f1a2b3c4d5", "filename": "test2.pdf", "status": "COMPLETED", "start_date": now},
     ]
 
 
 @pytest.fixture
 def mock_conversion():
     now = datetime.datetime.now()
-    return {"id": "123", "filename": "test1.pdf", "status": "RUNNING", "start_date": now}
+    return {"id": "3f2c5a1e-8b4d-4c6e-9a7f-0d1b2c3e4f50", "filename": "test1.pdf", "status": "RUNNING", "start_date": now}
+
+
+@pytest.fixture
+def conversion_workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SIMULATE_PROCESS_DELAY", "0")
+    monkeypatch.setattr("pdf2imgbe.lib.pdf_converter._convert_page", convert_page_stub)
+    return tmp_path
@@ -0,0 +1,35 @@
+import os
+import pytest
+
+from pdf2imgbe.lib.blob_store import blob_path, store_page, release_blobs
+
+
+@pytest.fixture(autouse=True)
+def blobs_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr("pdf2imgbe.lib.blob_store.BLOBS_FOLDER", str(tmp_path / "blobs"))
+    return tmp_path / "blobs"
+
+
+def test_store_page_deduplicates_identical_pages(tmp_path):
+    """Test identical pages share the same blob on disk"""
+    store_page(b"image", "abc123", "PNG", str(tmp_path / "Page_0.PNG"))
+    store_page(b"image", "abc123", "PNG", str(tmp_path / "Page_1.PNG"))
+
+    assert blob_path("abc123", "PNG").endswith("/ab/abc123.png")
+    assert os.stat(blob_path("abc123", "PNG")).st_nlink == 3
+    assert (tmp_path / "Page_1.PNG").read_bytes() == b"image"
+    assert os.path.samefile(tmp_path / "Page_0.PNG", tmp_path / "Page_1.PNG")
+
+
+def test_release_blobs_removes_unreferenced_blobs(tmp_path):
+    """Test blobs are removed only when no page references them anymore"""
+    store_page(b"image", "abc123", "PNG", str(tmp_path / "Page_0.PNG"))
+    store_page(b"image", "abc123", "PNG", str(tmp_path / "Page_1.PNG"))
+
+    os.remove(tmp_path / "Page_0.PNG")
+    release_blobs(["abc123"], "PNG")
+    assert os.path.exists(blob_path("abc123", "PNG"))
+
+    os.remove(tmp_path / "Page_1.PNG")
+    release_blobs(["abc123", "abc123"], "PNG")
+    assert not os.path.exists(blob_path("abc123", "PNG"))
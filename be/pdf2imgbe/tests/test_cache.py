@@ -0,0 +1,43 @@
+from unittest.mock import patch
+
+from pdf2imgbe.lib.cache import TTLCache
+
+
+def test_cache_get_set():
+    """Test cached values are returned and missing keys return None"""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("123", "value")
+
+    assert cache.get("123") == "value"
+    assert cache.get("456") is None
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the least recently used entry is evicted when the cache is full"""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("123", "value1")
+    cache.set("456", "value2")
+    cache.get("123")
+    cache.set("789", "value3")
+
+    assert cache.get("123") == "value1"
+    assert cache.get("456") is None
+    assert cache.get("789") == "value3"
+
+
+def test_cache_expires_entries():
+    """Test entries are not returned after their time to live"""
+    cache = TTLCache(max_size=2, ttl=60)
+    with patch("pdf2imgbe.lib.cache.time.monotonic", return_value=0):
+        cache.set("123", "value")
+    with patch("pdf2imgbe.lib.cache.time.monotonic", return_value=61):
+        assert cache.get("123") is None
+
+
+def test_cache_invalidate():
+    """Test invalidated entries are removed from the cache"""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("123", "value")
+    cache.invalidate("123")
+
+    assert cache.get("123") is None
@@ -1,15 +1,23 @@
+import time
 import pytest
+from datetime import timedelta
+from unittest.mock import patch
 
 from pdf2imgbe.lib.model import Conversion
-from pdf2imgbe.lib.statics import ConversionStatus
+from pdf2imgbe.lib.statics import ConversionStatus, StatsBucket, DB_CONNECT_TIMEOUT, PENDING_CONVERSION_CACHE_TTL
+from pdf2imgbe.services.db import SQLClient
+
+ID_1 = "3f2c5a1e-8b4d-4c6e-9a7f-0d1b2c3e4f50"
+ID_2 = "7a9e1c3d-5f2b-4d8a-b6c4-e0f1a2b3c4d5"
+ID_3 = "c1d2e3f4-a5b6-4c7d-8e9f-0a1b2c3d4e5f"
 
 
 def test_conversion_get_all(sql_client, mock_sql_connection, sample_conversions):
     """Test conversion_get_all method returns all conversions correctly"""
     _, mock_cursor = mock_sql_connection
     mock_cursor.fetchall.return_value = [
-        ("123", "test1.pdf", "RUNNING", sample_conversions[0]["start_date"]),
-        ("456", "test2.pdf", "COMPLETED", sample_conversions[1]["start_date"]),
+        (ID_1, "test1.pdf", "RUNNING", sample_conversions[0]["start_date"]),
+        (ID_2, "test2.pdf", "COMPLETED", sample_conversions[1]["start_date"]),
     ]
     mock_cursor.description = [
         ("id", None, None, None, None, None, None),
@@ -19,14 +27,14 @@ def test_conversion_get_all(sql_client, mock_sql_connection, sample_conversions)
     ]
 
     result = sql_client.conversion_get_all()
-    mock_cursor.execute.assert_called_once_with("SELECT * FROM conversion")
+    mock_cursor.execute.assert_called_once_with(f"SELECT {SQLClient.COLUMNS} FROM conversion")
 
     assert len(result) == 2
     assert all(isinstance(item, Conversion) for item in result)
-    assert result[0].id == "123"
+    assert result[0].id == ID_1
     assert result[0].filename == "test1.pdf"
     assert result[0].status == ConversionStatus.RUNNING
-    assert result[1].id == "456"
+    assert result[1].id == ID_2
     assert result[1].filename == "test2.pdf"
     assert result[1].status == ConversionStatus.COMPLETED
 
@@ -34,7 +42,7 @@ def test_conversion_get_all(sql_client, mock_sql_connection, sample_conversions)
 def test_conversion_get_by_id(sql_client, mock_sql_connection, mock_conversion):
     """Test conversion_get_by_id method returns the correct conversion"""
     _, mock_cursor = mock_sql_connection
-    mock_cursor.fetchone.return_value = ("123", "test1.pdf", "RUNNING", mock_conversion["start_date"])
+    mock_cursor.fetchone.return_value = (ID_1, "test1.pdf", "RUNNING", mock_conversion["start_date"])
     mock_cursor.description = [
         ("id", None, None, None, None, None, None),
         ("filename", None, None, None, None, None, None),
@@ -42,20 +50,298 @@ def test_conversion_get_by_id(sql_client, mock_sql_connection, mock_conversion):
         ("start_date", None, None, None, None, None, None),
     ]
 
-    result = sql_client.conversion_get_by_id("123")
-    mock_cursor.execute.assert_called_once_with("SELECT * FROM conversion WHERE id = %s", ("123",))
+    result = sql_client.conversion_get_by_id(ID_1)
+    mock_cursor.execute.assert_called_once_with(f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE id = %s", (ID_1,))
 
     assert isinstance(result, Conversion)
-    assert result.id == "123"
+    assert result.id == ID_1
     assert result.filename == "test1.pdf"
     assert result.status == ConversionStatus.RUNNING
     assert result.start_date == mock_conversion["start_date"]
 
 
 def test_conversion_get_by_id_not_found(sql_client, mock_sql_connection):
-    """Test error handling when conversion is not found"""
+    """Test conversion_get_by_id method returns None for an unknown ID"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchone.return_value = None
+
+    assert sql_client.conversion_get_by_id(ID_3) is None
+
+
+def test_conversion_get_by_id_malformed(sql_client, mock_sql_connection):
+    """Test conversion_get_by_id method does not query the database for a malformed ID"""
+    _, mock_cursor = mock_sql_connection
+
+    assert sql_client.conversion_get_by_id("non_existent_id") is None
+    mock_cursor.execute.assert_not_called()
+
+
+def test_conversion_get_by_id_canonical(sql_client, mock_sql_connection):
+    """Test conversion_get_by_id method queries the canonical form of the ID"""
     _, mock_cursor = mock_sql_connection
     mock_cursor.fetchone.return_value = None
 
+    sql_client.conversion_get_by_id(f"urn:uuid:{ID_1.upper()}")
+    mock_cursor.execute.assert_called_once_with(f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE id = %s", (ID_1,))
+
+
+def test_query_failure_rolled_back(sql_client, mock_sql_connection):
+    """Test a failed query is rolled back, so that the following queries of the connection do not fail"""
+    mock_conn, mock_cursor = mock_sql_connection
+    mock_cursor.execute.side_effect = [Exception("invalid input syntax for type uuid"), None]
+    mock_cursor.fetchone.return_value = ("QUEUED",)
+
     with pytest.raises(Exception):
-        sql_client.conversion_get_by_id("non_existent_id")
+        sql_client.conversion_get_status(ID_1)
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+
+    assert sql_client.conversion_get_status(ID_1) == ConversionStatus.QUEUED
+    mock_conn.commit.assert_called_once()
+
+
+def test_conversion_update_status(sql_client, mock_sql_connection):
+    """Test conversion_update_status method stores the status and the failure reason"""
+    mock_conn, mock_cursor = mock_sql_connection
+
+    with patch("pdf2imgbe.services.db.datetime") as mock_datetime:
+        sql_client.conversion_update_status(ID_1, ConversionStatus.FAILED, "Conversion timed out after 600 seconds")
+    mock_cursor.execute.assert_called_once_with(
+        "UPDATE conversion SET status = %s, update_date = %s, end_date = %s, failure_reason = %s, "
+        "page_count = COALESCE(%s, page_count) WHERE id = %s AND status <> %s",
+        (
+            "FAILED",
+            mock_datetime.now.return_value,
+            mock_datetime.now.return_value,
+            "Conversion timed out after 600 seconds",
+            None,
+            ID_1,
+            "CANCELLED",
+        ),
+    )
+    mock_conn.commit.assert_called_once()
+
+
+def test_conversion_update_status_cancelled(sql_client, mock_sql_connection):
+    """Test conversion_update_status method reports a conversion cancelled meanwhile as not updated"""
+    _, mock_cursor = mock_sql_connection
+
+    mock_cursor.rowcount = 1
+    assert sql_client.conversion_update_status(ID_1, ConversionStatus.COMPLETED)
+    mock_cursor.rowcount = 0
+    assert not sql_client.conversion_update_status(ID_1, ConversionStatus.COMPLETED)
+
+
+def test_conversion_cancel(sql_client, mock_sql_connection):
+    """Test conversion_cancel method returns the previous status of a cancelled conversion, or None if finished"""
+    _, mock_cursor = mock_sql_connection
+
+    mock_cursor.fetchone.return_value = ("RUNNING",)
+    assert sql_client.conversion_cancel(ID_1) == ConversionStatus.RUNNING
+    query, params = mock_cursor.execute.call_args.args
+    assert "previous.status IN (%s, %s)" in query
+    assert params[0] == "CANCELLED" and params[3] == ID_1 and params[4:] == ("QUEUED", "RUNNING")
+
+    mock_cursor.fetchone.return_value = None
+    assert sql_client.conversion_cancel(ID_1) is None
+
+
+def test_conversion_update_status_not_final(sql_client, mock_sql_connection):
+    """Test conversion_update_status method clears the completion date of a conversion that is not finished"""
+    _, mock_cursor = mock_sql_connection
+
+    sql_client.conversion_update_status(ID_1, ConversionStatus.RUNNING)
+    assert mock_cursor.execute.call_args.args[1][2] is None
+
+
+def test_conversion_get_by_id_cached(sql_client, mock_sql_connection, mock_conversion):
+    """Test conversion_get_by_id method caches the conversions until they change, only for a second until they are
+    finished"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchone.return_value = (ID_1, "test1.pdf", "RUNNING", mock_conversion["start_date"])
+    mock_cursor.description = [
+        ("id", None, None, None, None, None, None),
+        ("filename", None, None, None, None, None, None),
+        ("status", None, None, None, None, None, None),
+        ("start_date", None, None, None, None, None, None),
+    ]
+
+    sql_client.conversion_get_by_id(ID_1)
+    result = sql_client.conversion_get_by_id(ID_1)
+    assert mock_cursor.execute.call_count == 1
+    assert result.status == ConversionStatus.RUNNING
+    with patch("pdf2imgbe.lib.cache.time.monotonic", return_value=time.monotonic() + PENDING_CONVERSION_CACHE_TTL + 1):
+        sql_client.conversion_get_by_id(ID_1)
+    assert mock_cursor.execute.call_count == 2
+
+    mock_cursor.fetchone.return_value = (ID_1, "test1.pdf", "COMPLETED", mock_conversion["start_date"])
+    sql_client.conversion_update_status(ID_1, ConversionStatus.COMPLETED)
+    sql_client.conversion_get_by_id(ID_1)
+    result = sql_client.conversion_get_by_id(ID_1)
+    assert mock_cursor.execute.call_count == 4
+    assert result.status == ConversionStatus.COMPLETED
+
+    sql_client.conversion_update_status(ID_1, ConversionStatus.CANCELLED)
+    sql_client.conversion_get_by_id(ID_1)
+    assert mock_cursor.execute.call_count == 6
+
+
+def test_conversion_get_by_ids(sql_client, mock_sql_connection, sample_conversions):
+    """Test conversion_get_by_ids method fetches many conversions with a single query"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.return_value = [
+        (ID_1, "test1.pdf", "RUNNING", sample_conversions[0]["start_date"]),
+        (ID_2, "test2.pdf", "COMPLETED", sample_conversions[1]["start_date"]),
+    ]
+    mock_cursor.description = [
+        ("id", None, None, None, None, None, None),
+        ("filename", None, None, None, None, None, None),
+        ("status", None, None, None, None, None, None),
+        ("start_date", None, None, None, None, None, None),
+    ]
+
+    result = sql_client.conversion_get_by_ids([ID_1, ID_2, ID_3])
+    mock_cursor.execute.assert_called_once_with(
+        f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE id = ANY(%s::UUID[])", ([ID_1, ID_2, ID_3],)
+    )
+
+    assert [c.id for c in result] == [ID_1, ID_2]
+    assert result[1].status == ConversionStatus.COMPLETED
+
+
+def test_conversion_get_by_ids_changed_since(sql_client, mock_sql_connection, sample_conversions):
+    """Test conversion_get_by_ids method filters the conversions updated after the provided date"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.return_value = []
+
+    result = sql_client.conversion_get_by_ids([ID_1, ID_2], sample_conversions[0]["start_date"])
+    mock_cursor.execute.assert_called_once_with(
+        f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE id = ANY(%s::UUID[]) AND update_date > %s",
+        ([ID_1, ID_2], sample_conversions[0]["start_date"]),
+    )
+    assert result == []
+
+
+def test_conversion_get_by_ids_malformed(sql_client, mock_sql_connection):
+    """Test conversion_get_by_ids method omits the malformed IDs from the query"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.return_value = []
+
+    sql_client.conversion_get_by_ids([ID_1, "non_existent_id"])
+    mock_cursor.execute.assert_called_once_with(
+        f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE id = ANY(%s::UUID[])", ([ID_1],)
+    )
+
+    mock_cursor.execute.reset_mock()
+    assert sql_client.conversion_get_by_ids(["non_existent_id"]) == []
+    mock_cursor.execute.assert_not_called()
+
+
+def test_conversion_get_by_ids_canonical(sql_client, mock_sql_connection):
+    """Test conversion_get_by_ids method queries the canonical form of the IDs that the database would reject"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.return_value = []
+
+    sql_client.conversion_get_by_ids([f"urn:uuid:{ID_1}", f"{{{ID_2.upper()}}}"])
+    mock_cursor.execute.assert_called_once_with(
+        f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE id = ANY(%s::UUID[])", ([ID_1, ID_2],)
+    )
+
+
+def test_conversion_get_stats(sql_client, mock_sql_connection, sample_conversions):
+    """Test conversion_get_stats method groups the aggregates computed by the database"""
+    _, mock_cursor = mock_sql_connection
+    since = sample_conversions[0]["start_date"]
+    hour = since.replace(minute=0, second=0, microsecond=0)
+    mock_cursor.fetchall.side_effect = [
+        [("QUEUED", 1), ("RUNNING", 2), ("COMPLETED", 30), ("FAILED", 4), ("CANCELLED", 0)],
+        [(hour, "COMPLETED", 10), (hour, "FAILED", 1), (hour + timedelta(hours=1), "COMPLETED", 20)],
+    ]
+    mock_cursor.fetchone.return_value = ([12.5, 40.0, 58.2],)
+
+    result = sql_client.conversion_get_stats(since, StatsBucket.HOUR)
+    assert mock_cursor.execute.call_count == 3
+    assert mock_cursor.execute.call_args_list[1].args[1] == ("hour", since)
+
+    assert result.status_counts["COMPLETED"] == 30
+    assert [b.start_date for b in result.throughput] == [hour, hour + timedelta(hours=1)]
+    assert result.throughput[0].status_counts == {"COMPLETED": 10, "FAILED": 1}
+    assert result.duration_percentiles == {"p50": 12.5, "p95": 40.0, "p99": 58.2}
+
+
+def test_conversion_get_stats_empty(sql_client, mock_sql_connection, sample_conversions):
+    """Test conversion_get_stats method handles a window without conversions"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.side_effect = [[("QUEUED", 0)], []]
+    mock_cursor.fetchone.return_value = (None,)
+
+    result = sql_client.conversion_get_stats(sample_conversions[0]["start_date"], StatsBucket.DAY)
+    assert result.throughput == []
+    assert result.duration_percentiles == {"p50": None, "p95": None, "p99": None}
+
+
+def test_conversion_get_by_status(sql_client, mock_sql_connection, sample_conversions):
+    """Test conversion_get_by_status method fetches the conversions with a status, oldest first"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.return_value = [(ID_1, "test1.pdf", "QUEUED", sample_conversions[0]["start_date"])]
+    mock_cursor.description = [
+        ("id", None, None, None, None, None, None),
+        ("filename", None, None, None, None, None, None),
+        ("status", None, None, None, None, None, None),
+        ("start_date", None, None, None, None, None, None),
+    ]
+
+    result = sql_client.conversion_get_by_status(ConversionStatus.QUEUED)
+    mock_cursor.execute.assert_called_once_with(
+        f"SELECT {SQLClient.COLUMNS} FROM conversion WHERE status = %s ORDER BY start_date", ("QUEUED",)
+    )
+    assert [c.id for c in result] == [ID_1]
+
+
+def test_conversion_get_status(sql_client, mock_sql_connection):
+    """Test conversion_get_status method reads the status from the database"""
+    _, mock_cursor = mock_sql_connection
+    mock_cursor.fetchone.return_value = ("CANCELLED",)
+
+    assert sql_client.conversion_get_status(ID_1) == ConversionStatus.CANCELLED
+    mock_cursor.execute.assert_called_once_with("SELECT status FROM conversion WHERE id = %s", (ID_1,))
+
+    mock_cursor.fetchone.return_value = None
+    assert sql_client.conversion_get_status(ID_3) is None
+
+
+def test_conversion_start(sql_client, mock_sql_connection):
+    """Test conversion_start method starts a conversion only if it is still queued"""
+    mock_conn, mock_cursor = mock_sql_connection
+
+    mock_cursor.rowcount = 1
+    with patch("pdf2imgbe.services.db.datetime") as mock_datetime:
+        assert sql_client.conversion_start(ID_1)
+    mock_cursor.execute.assert_called_once_with(
+        "UPDATE conversion SET status = %s, update_date = %s WHERE id = %s AND status = %s",
+        ("RUNNING", mock_datetime.now.return_value, ID_1, "QUEUED"),
+    )
+    mock_conn.commit.assert_called_once()
+
+    mock_cursor.rowcount = 0
+    assert not sql_client.conversion_start(ID_1)
+
+
+def test_connection_deferred(mock_sql_connection):
+    """Test the SQL client connects to the database on the first query, and again after the connection is closed"""
+    mock_conn, mock_cursor = mock_sql_connection
+    mock_cursor.fetchall.return_value = []
+
+    with patch("pdf2imgbe.services.db.connect", return_value=mock_conn) as mock_connect:
+        sql_client = SQLClient()
+        mock_connect.assert_not_called()
+
+        sql_client.conversion_get_all()
+        sql_client.conversion_get_all()
+        mock_connect.assert_called_once()
+        assert mock_connect.call_args.kwargs["connect_timeout"] == DB_CONNECT_TIMEOUT
+
+        sql_client.close()
+        mock_conn.close.assert_called_once()
+        sql_client.conversion_get_all()
+        assert mock_connect.call_count == 2
@@ -0,0 +1,38 @@
+import json
+import logging
+
+from pdf2imgbe.lib.log import _ContextFilter, _SamplingFilter, _JsonFormatter, request_id_var, conversion_id_var
+
+
+def _make_record(lineno: int = 1, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("streamlit-pdf2img", logging.INFO, "app.py", lineno, "Polling %s", ("status",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_filter():
+    """Test only one in sample_rate of the sampled records is kept, counted separately for each logging call"""
+    sampling_filter = _SamplingFilter(3)
+
+    assert [sampling_filter.filter(_make_record(sampled=True)) for _ in range(6)] == [True, False, False, True, False, False]
+    assert sampling_filter.filter(_make_record(lineno=2, sampled=True))
+    assert all(sampling_filter.filter(_make_record()) for _ in range(3))
+
+
+def test_json_formatter_with_context():
+    """Test the records are formatted as JSON carrying the correlation IDs of the context"""
+    request_id_token = request_id_var.set("abc")
+    conversion_id_token = conversion_id_var.set("123")
+    try:
+        record = _make_record()
+        _ContextFilter().filter(record)
+    finally:
+        request_id_var.reset(request_id_token)
+        conversion_id_var.reset(conversion_id_token)
+
+    log = json.loads(_JsonFormatter().format(record))
+    assert log["message"] == "Polling status"
+    assert log["level"] == "INFO"
+    assert log["request_id"] == "abc"
+    assert log["conversion_id"] == "123"
+    assert "sample_rate" not in log
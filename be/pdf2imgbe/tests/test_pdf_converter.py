@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+import time
+import asyncio
+import datetime
+import pytest
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf2imgbe.lib.exception import ProcessException
+from pdf2imgbe.lib.model import Conversion, ConversionManifest
+from pdf2imgbe.lib.statics import ConversionStatus
+from pdf2imgbe.lib.pdf_converter import convert_pdf_to_images, rebuild_manifest
+
+
+def _blob_files():
+    return [f for _, _, files in os.walk("results/blobs") for f in files]
+
+
+def _slow_convert_page_stub(convert_page_stub):
+    def convert_page(*args, **kwargs):
+        time.sleep(0.3)
+        return convert_page_stub(*args, **kwargs)
+
+    return convert_page
+
+
+def test_convert_pdf_to_images_timeout(conversion_workspace, monkeypatch):
+    """Test a conversion timing out is marked as failed and its partial results removed, including the page in flight"""
+    from pdf2imgbe.lib import pdf_converter
+
+    monkeypatch.setenv("CONVERSION_TIMEOUT", "1")
+    monkeypatch.setattr(pdf_converter, "_convert_page", _slow_convert_page_stub(pdf_converter._convert_page))
+    sql_client = MagicMock()
+    sql_client.conversion_get_status.return_value = ConversionStatus.RUNNING
+    conversion = Conversion(
+        id="a", filename="a.pdf", status=ConversionStatus.RUNNING, start_date=datetime.datetime.now(), page_count=100
+    )
+    executor = ThreadPoolExecutor(1)
+
+    with pytest.raises(ProcessException, match="timed out"):
+        asyncio.run(
+            convert_pdf_to_images(sql_client, conversion, b"%PDF", "results/a", asyncio.Event(), asyncio.Event(), executor)
+        )
+    executor.shutdown(wait=True)
+
+    sql_client.conversion_update_status.assert_called_once_with(
+        "a", ConversionStatus.FAILED, "Conversion timed out after 1 seconds", 100
+    )
+    assert not os.path.exists("results/a")
+    assert _blob_files() == []
+
+
+def test_convert_pdf_to_images_timeout_keeps_profile(conversion_workspace, monkeypatch):
+    """Test a profiled conversion timing out keeps its profile only"""
+    from pdf2imgbe.lib import pdf_converter
+
+    monkeypatch.setenv("CONVERSION_TIMEOUT", "1")
+    monkeypatch.setattr(pdf_converter, "_convert_page", _slow_convert_page_stub(pdf_converter._convert_page))
+    conversion = Conversion(
+        id="a", filename="a.pdf", status=ConversionStatus.RUNNING, start_date=datetime.datetime.now(), page_count=100
+    )
+    executor = ThreadPoolExecutor(1)
+
+    with pytest.raises(ProcessException):
+        asyncio.run(
+            convert_pdf_to_images(
+                MagicMock(), conversion, b"%PDF", "results/a", asyncio.Event(), asyncio.Event(), executor, profiled=True
+            )
+        )
+    executor.shutdown(wait=True)
+
+    assert os.listdir("results/a") == ["profile"]
+    assert _blob_files() == []
+
+
+def test_convert_pdf_to_images_cancelled_meanwhile(conversion_workspace):
+    """Test a conversion cancelled by another backend process after its last check keeps its status and no results"""
+    sql_client = MagicMock()
+    sql_client.conversion_get_status.return_value = ConversionStatus.RUNNING
+    sql_client.conversion_update_status.return_value = False
+    conversion = Conversion(
+        id="a", filename="a.pdf", status=ConversionStatus.RUNNING, start_date=datetime.datetime.now(), page_count=2
+    )
+    executor = ThreadPoolExecutor(1)
+
+    asyncio.run(convert_pdf_to_images(sql_client, conversion, b"%PDF", "results/a", asyncio.Event(), asyncio.Event(), executor))
+    executor.shutdown(wait=True)
+
+    sql_client.conversion_update_status.assert_called_once_with("a", ConversionStatus.COMPLETED, None, 2)
+    assert not os.path.exists("results/a")
+    assert _blob_files() == []
+
+
+def _png_header(width: int, height: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + (13).to_bytes(4, "big") + b"IHDR" + width.to_bytes(4, "big") + height.to_bytes(4, "big")
+
+
+def test_rebuild_manifest(conversion_workspace):
+    """Test the manifest of a conversion completed without one is rebuilt from its images and saved"""
+    os.makedirs("results/a")
+    images = [_png_header(10, 20), _png_header(30, 40)]
+    for i, image in enumerate(images):
+        with open(f"results/a/Page_{i}.PNG", "wb") as f:
+            f.write(image)
+
+    manifest = rebuild_manifest("a", "results/a")
+
+    assert manifest.page_count == 2
+    assert [(p.page, p.filename, p.width, p.height) for p in manifest.pages] == [
+        (1, "Page_0.PNG", 10, 20),
+        (2, "Page_1.PNG", 30, 40),
+    ]
+    assert [p.checksum for p in manifest.pages] == [hashlib.sha256(image).hexdigest() for image in images]
+    with open("results/a/manifest.json") as f:
+        assert ConversionManifest.from_dict(json.load(f)) == manifest
+
+
+def test_rebuild_manifest_without_images(conversion_workspace):
+    """Test no manifest is rebuilt for a conversion whose images are no longer available"""
+    assert rebuild_manifest("a", "results/a") is None
+    assert not os.path.exists("results/a")
@@ -0,0 +1,74 @@
+import pytest
+from http import HTTPStatus
+from unittest.mock import patch
+from pdf2image.exceptions import PDFPageCountError
+
+from pdf2imgbe.lib.preflight import preflight_pdf, PDFINFO_MAX_LAST_PAGE
+from pdf2imgbe.lib.exception import ProcessException
+
+PDF_CONTENT = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n1 0 obj\n<<>>\nendobj\n%%EOF\n"
+
+
+@pytest.fixture
+def mock_pdfinfo():
+    with patch("pdf2image.pdfinfo_from_bytes") as mock_pdfinfo:
+        mock_pdfinfo.return_value = {
+            "Pages": 2,
+            "Encrypted": "no",
+            "Page    1 size": "612 x 792 pts (letter)",
+            "Page    1 rot": "0",
+            "Page    2 size": "1224 x 792 pts",
+            "Page    2 rot": "0",
+        }
+        yield mock_pdfinfo
+
+
+def test_preflight_pdf(mock_pdfinfo):
+    """Test preflight_pdf returns the page count, the page sizes and the estimated megapixels"""
+    result = preflight_pdf(PDF_CONTENT, timeout=10, max_pages=100, max_estimated_megapixels=0)
+    mock_pdfinfo.assert_called_once_with(PDF_CONTENT, timeout=10, first_page=1, last_page=100)
+
+    assert result.page_count == 2
+    assert result.page_sizes == [(612.0, 792.0), (1224.0, 792.0)]
+    assert not result.encrypted
+    assert result.estimated_megapixels == pytest.approx(3 * 1700 * 2200 / 1e6, abs=0.01)
+
+
+def test_preflight_pdf_no_page_limit(mock_pdfinfo):
+    """Test preflight_pdf still requests the size of every page when the page limit is disabled"""
+    result = preflight_pdf(PDF_CONTENT, timeout=10, max_pages=0, max_estimated_megapixels=0)
+    mock_pdfinfo.assert_called_once_with(PDF_CONTENT, timeout=10, first_page=1, last_page=PDFINFO_MAX_LAST_PAGE)
+
+    assert result.page_count == 2
+    assert result.estimated_megapixels == pytest.approx(3 * 1700 * 2200 / 1e6, abs=0.01)
+
+
+def test_preflight_pdf_invalid_header(mock_pdfinfo):
+    """Test preflight_pdf rejects files without a PDF header without running pdfinfo"""
+    with pytest.raises(ProcessException) as e:
+        preflight_pdf(b"GIF89a", timeout=10, max_pages=100, max_estimated_megapixels=0)
+    assert e.value.status_code == HTTPStatus.BAD_REQUEST
+    mock_pdfinfo.assert_not_called()
+
+
+def test_preflight_pdf_password_protected(mock_pdfinfo):
+    """Test preflight_pdf rejects password protected files"""
+    mock_pdfinfo.side_effect = PDFPageCountError("Unable to get page count.\nCommand Line Error: Incorrect password")
+    with pytest.raises(ProcessException) as e:
+        preflight_pdf(PDF_CONTENT, timeout=10, max_pages=100, max_estimated_megapixels=0)
+    assert e.value.status_code == HTTPStatus.BAD_REQUEST
+    assert "Password" in e.value.message
+
+
+def test_preflight_pdf_too_many_pages(mock_pdfinfo):
+    """Test preflight_pdf rejects files exceeding the maximum number of pages"""
+    with pytest.raises(ProcessException) as e:
+        preflight_pdf(PDF_CONTENT, timeout=10, max_pages=1, max_estimated_megapixels=0)
+    assert e.value.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def test_preflight_pdf_too_many_megapixels(mock_pdfinfo):
+    """Test preflight_pdf rejects files exceeding the maximum number of megapixels to render"""
+    with pytest.raises(ProcessException) as e:
+        preflight_pdf(PDF_CONTENT, timeout=10, max_pages=100, max_estimated_megapixels=5)
+    assert e.value.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
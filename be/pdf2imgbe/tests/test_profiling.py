@@ -0,0 +1,43 @@
+import os
+import json
+
+from pdf2imgbe.lib.profiling import SpanTimer, ConversionProfiler, profile_call
+
+
+def _work(n: int, spans: SpanTimer) -> int:
+    with spans.span("sum"):
+        return sum(range(n))
+
+
+def test_span_timer():
+    """Test the time of spans with the same name is summed, and a disabled timer records nothing"""
+    spans = SpanTimer()
+    for _ in range(3):
+        with spans.span("render"):
+            pass
+    spans.add("render", 1.0, 2)
+
+    assert spans.spans["render"]["count"] == 5
+    assert spans.spans["render"]["seconds"] >= 1.0
+
+    disabled_spans = SpanTimer(enabled=False)
+    with disabled_spans.span("render"):
+        pass
+    assert disabled_spans.spans == {}
+
+
+def test_conversion_profiler(tmp_path):
+    """Test the profiles of the workers are merged in a single statistics file and a summary"""
+    profiler = ConversionProfiler(str(tmp_path / "profile"))
+    for page in (1, 2):
+        result, worker_profile = profile_call(profiler.get_stats_path(f"page_{page}"), _work, 1000)
+        profiler.add_worker_profile(worker_profile)
+        assert result == 499500
+
+    profile = profiler.save("123")
+    assert profile.spans["sum"]["count"] == 2
+    assert {"backend", "worker", "poppler"} <= set(profile.peak_memory_mb)
+    assert any("_work" in f["function"] and f["calls"] == 2 for f in profile.top_functions)
+    assert sorted(os.listdir(tmp_path / "profile")) == ["profile.json", "profile.prof"]
+    with open(tmp_path / "profile" / "profile.json") as f:
+        assert json.load(f)["id"] == "123"
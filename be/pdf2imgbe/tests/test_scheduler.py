@@ -0,0 +1,158 @@
+import os
+import asyncio
+import datetime
+import pytest
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf2imgbe.lib.model import Conversion
+from pdf2imgbe.lib.log import conversion_id_var
+from pdf2imgbe.lib.pdf_converter import save_source
+from pdf2imgbe.lib.statics import ConversionStatus
+from pdf2imgbe.services.scheduler import ConversionScheduler
+
+SETTLE_SECONDS = 0.5
+
+
+@pytest.fixture(autouse=True)
+def workspace(conversion_workspace, monkeypatch):
+    monkeypatch.setattr(
+        ConversionScheduler, "_create_executor", lambda self: ThreadPoolExecutor(self._max_concurrent_conversions)
+    )
+    return conversion_workspace
+
+
+@pytest.fixture
+def mock_sql_client():
+    client = MagicMock()
+    client.conversion_start.return_value = True
+    client.conversion_get_status.return_value = ConversionStatus.RUNNING
+    return client
+
+
+def _conversion(id: str, page_count: int = 5) -> Conversion:
+    return Conversion(
+        id=id, filename=f"{id}.pdf", status=ConversionStatus.QUEUED, start_date=datetime.datetime.now(), page_count=page_count
+    )
+
+
+def _final_status(mock_sql_client: MagicMock, id: str) -> ConversionStatus:
+    statuses = [c.args[1] for c in mock_sql_client.conversion_update_status.call_args_list if c.args[0] == id]
+    return statuses[-1] if statuses else None
+
+
+def _blob_files():
+    return [f for _, _, files in os.walk("results/blobs") for f in files]
+
+
+async def _wait_running(mock_sql_client: MagicMock, id: str):
+    while not any(c.args[0] == id for c in mock_sql_client.conversion_start.call_args_list):
+        await asyncio.sleep(0.01)
+
+
+def test_cancel_running_conversion(mock_sql_client):
+    """Test cancelling a running conversion interrupts it before its next page and removes its results"""
+
+    async def scenario():
+        scheduler = ConversionScheduler(mock_sql_client, 1, 0)
+        scheduler.submit(_conversion("a"), b"%PDF", "results/a")
+        await _wait_running(mock_sql_client, "a")
+        assert scheduler.cancel("a")
+        await asyncio.sleep(SETTLE_SECONDS)
+        assert not scheduler.cancel("a")
+
+    asyncio.run(scenario())
+    assert _final_status(mock_sql_client, "a") == ConversionStatus.CANCELLED
+    assert not os.path.exists("results/a")
+    assert _blob_files() == []
+
+
+def test_cancel_queued_conversion(mock_sql_client):
+    """Test cancelling a queued conversion removes it from the queue without starting it"""
+
+    async def scenario():
+        scheduler = ConversionScheduler(mock_sql_client, 1, 0)
+        scheduler.submit(_conversion("a"), b"%PDF", "results/a")
+        scheduler.submit(_conversion("b"), b"%PDF", "results/b")
+        await _wait_running(mock_sql_client, "a")
+        assert scheduler.cancel("b")
+        await asyncio.sleep(SETTLE_SECONDS)
+
+    asyncio.run(scenario())
+    assert [c.args[0] for c in mock_sql_client.conversion_start.call_args_list] == ["a"]
+    assert _final_status(mock_sql_client, "a") == ConversionStatus.COMPLETED
+    assert _final_status(mock_sql_client, "b") is None
+    assert not os.path.exists("results/b")
+
+
+def test_run_unclaimed_conversion(mock_sql_client):
+    """Test a conversion claimed by another backend process, or cancelled, before it gets a slot is not converted"""
+    mock_sql_client.conversion_start.return_value = False
+
+    async def scenario():
+        scheduler = ConversionScheduler(mock_sql_client, 1, 0)
+        scheduler.submit(_conversion("a"), b"%PDF", "results/a")
+        await asyncio.sleep(SETTLE_SECONDS)
+
+    asyncio.run(scenario())
+    mock_sql_client.conversion_start.assert_called_once_with("a")
+    mock_sql_client.conversion_update_status.assert_not_called()
+    assert not os.path.exists("results/a")
+
+
+def test_drain(mock_sql_client):
+    """Test draining lets the running conversion finish and requeues the queued one with its PDF file"""
+
+    async def scenario():
+        scheduler = ConversionScheduler(mock_sql_client, 1, 0)
+        scheduler.submit(_conversion("a"), b"%PDF a", "results/a")
+        scheduler.submit(_conversion("b"), b"%PDF b", "results/b")
+        await _wait_running(mock_sql_client, "a")
+        await scheduler.drain(timeout=10)
+        assert await scheduler.resume() == 0
+
+    asyncio.run(scenario())
+    assert _final_status(mock_sql_client, "a") == ConversionStatus.COMPLETED
+    assert [c.args[0] for c in mock_sql_client.conversion_start.call_args_list] == ["a"]
+    assert _final_status(mock_sql_client, "b") is None
+    assert os.listdir("results/b") == ["source.pdf"]
+    with open("results/b/source.pdf", "rb") as f:
+        assert f.read() == b"%PDF b"
+
+
+def test_drain_requeues_running_conversion(mock_sql_client):
+    """Test draining requeues the conversion still running after the timeout, without its partial results"""
+
+    async def scenario():
+        scheduler = ConversionScheduler(mock_sql_client, 1, 0)
+        scheduler.submit(_conversion("a", page_count=100), b"%PDF a", "results/a")
+        await _wait_running(mock_sql_client, "a")
+        await scheduler.drain(timeout=0.2)
+
+    asyncio.run(scenario())
+    assert _final_status(mock_sql_client, "a") == ConversionStatus.QUEUED
+    assert os.listdir("results/a") == ["source.pdf"]
+    assert _blob_files() == []
+
+
+def test_resume(mock_sql_client):
+    """Test resuming queues the requeued conversions only, i.e. those with a PDF file and not already queued, and binds
+    their ID to their logs"""
+    save_source(b"%PDF a", "results/a")
+    save_source(b"%PDF c", "results/c")
+    mock_sql_client.conversion_get_by_status.return_value = [_conversion("a"), _conversion("b"), _conversion("c")]
+    mock_sql_client.conversion_start.side_effect = lambda id: conversion_id_var.get() == id
+
+    async def scenario():
+        scheduler = ConversionScheduler(mock_sql_client, 1, 0)
+        scheduler.submit(_conversion("c"), b"%PDF c", "results/c")
+        assert await scheduler.resume() == 1
+        await asyncio.sleep(SETTLE_SECONDS * 2)
+
+    asyncio.run(scenario())
+    mock_sql_client.conversion_get_by_status.assert_called_once_with(ConversionStatus.QUEUED)
+    assert sorted(c.args[0] for c in mock_sql_client.conversion_start.call_args_list) == ["a", "c"]
+    assert _final_status(mock_sql_client, "a") == ConversionStatus.COMPLETED
+    assert _final_status(mock_sql_client, "c") == ConversionStatus.COMPLETED
+    assert _final_status(mock_sql_client, "b") is None
+    assert "source.pdf" not in os.listdir("results/a")
@@ -0,0 +1,32 @@
+import os
+from PIL import Image
+
+from pdf2imgbe.lib.tiles import get_tile_levels, get_dzi_descriptor, generate_tiles
+
+
+def test_get_tile_levels():
+    """Test the pyramid goes from 1x1 pixel to full resolution"""
+    assert get_tile_levels(1, 1) == 1
+    assert get_tile_levels(256, 100) == 9
+    assert get_tile_levels(600, 20) == 11
+
+
+def test_get_dzi_descriptor():
+    """Test the descriptor contains the tiling parameters and the size of the image"""
+    descriptor = get_dzi_descriptor(600, 20)
+
+    assert 'TileSize="256" Overlap="1" Format="png"' in descriptor
+    assert '<Size Width="600" Height="20"/>' in descriptor
+
+
+def test_generate_tiles(tmp_path):
+    """Test the tiles of every level are saved with their overlap"""
+    levels = generate_tiles(Image.new("RGB", (600, 20)), str(tmp_path))
+
+    assert levels == 11
+    assert sorted(os.listdir(tmp_path / "10")) == ["0_0.png", "1_0.png", "2_0.png"]
+    assert os.listdir(tmp_path / "0") == ["0_0.png"]
+    with Image.open(tmp_path / "10" / "1_0.png") as tile:
+        assert tile.size == (256 + 2, 20)
+    with Image.open(tmp_path / "0" / "0_0.png") as tile:
+        assert tile.size == (1, 1)
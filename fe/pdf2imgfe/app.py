@@ -1,14 +1,27 @@
-from pdf2imgfe.lib.log import logger
+from pdf2imgfe.lib.log import logger, conversion_id_var
 
 import asyncio
+import typing as T
+from http import HTTPStatus
 import streamlit as st
 
-from app_components import db_modal
+from app_components import db_modal, stats_modal
 
 from pdf2imgfe.services.convert import ConvertService
 from pdf2imgfe.lib.io import zip_images
+from pdf2imgfe.lib.cache import BytesLRUCache
 from pdf2imgfe.lib.exception import ProcessException
-from pdf2imgfe.lib.statics import ConversionStatus, IMAGE_FILENAME_FORMAT, IMAGE_FILE_EXTENSION
+from pdf2imgfe.lib.statics import (
+    ConversionStatus,
+    IMAGE_FILENAME_FORMAT,
+    IMAGE_FILE_EXTENSION,
+    RESULTS_PAGES_PER_VIEW,
+    RESULTS_CACHE_MAX_ENTRIES,
+    RESULTS_CACHE_TTL,
+    RESULTS_PAGE_CACHE_MAX_BYTES,
+    RESULTS_ZIP_CACHE_MAX_BYTES,
+    RESULTS_ZIP_CACHE_TTL,
+)
 
 # Initialize the app
 st.set_page_config(page_title="PDF to Image Converter", page_icon="🧞‍♂️", layout="wide")
@@ -19,14 +32,59 @@ st.write(
 st.write("<style>div.block-container{padding-top:3rem;}</style>", unsafe_allow_html=True)  # Reduce padding at top of the page
 
 
+@st.cache_resource
+def __get_convert_service() -> ConvertService:
+    """
+    Get the service to interact with the backend, shared across reruns and sessions so that its connections are reused.
+
+    Returns
+    -------
+    ConvertService
+        Service to interact with the backend.
+    """
+
+    return ConvertService()
+
+
+@st.cache_resource
+def __get_page_cache() -> BytesLRUCache:
+    """
+    Get the cache of the images of the conversion results, shared across reruns and sessions, and bounded by the size of
+    the images rather than their count since a page may weigh from kilobytes to tens of megabytes.
+
+    Returns
+    -------
+    BytesLRUCache
+        Cache of the images by conversion ID and page number.
+    """
+
+    return BytesLRUCache(RESULTS_PAGE_CACHE_MAX_BYTES, RESULTS_CACHE_TTL)
+
+
+@st.cache_resource
+def __get_zip_cache() -> BytesLRUCache:
+    """
+    Get the cache of the ZIP archives of the conversion results, shared across reruns and sessions, and bounded by the
+    size of the archives since a single archive may weigh hundreds of megabytes.
+
+    Returns
+    -------
+    BytesLRUCache
+        Cache of the ZIP archives by conversion ID.
+    """
+
+    return BytesLRUCache(RESULTS_ZIP_CACHE_MAX_BYTES, RESULTS_ZIP_CACHE_TTL)
+
+
 def __heading_section(convert_service: ConvertService) -> st.delta_generator.DeltaGenerator:
     """
-    Render the heading section of the app, containing the title, the description, and the database modal.
+    Render the heading section of the app, containing the title, the description, and the database and statistics
+    modals.
 
     Parameters
     ----------
     convert_service : ConvertService
-        Service to get all conversions.
+        Service to get all conversions and their statistics.
 
     Returns
     -------
@@ -37,12 +95,14 @@ def __heading_section(convert_service: ConvertService) -> st.delta_generator.Del
     _, main_section = st.columns([0.08, 0.92])
     main_section.title("PDF to Image Converter")
     main_section.markdown("<br>", unsafe_allow_html=True)
-    _, main_section, side_section = st.columns([0.08, 0.82, 0.1])
+    _, main_section, db_section, stats_section = st.columns([0.08, 0.78, 0.07, 0.07])
     main_section.markdown(
         "Upload a PDF file to convert it to images. Start the conversion process to generate an image for each page of the PDF. 📄"
     )
-    with side_section:
+    with db_section:
         db_modal.load(convert_service.get_all_conversions)
+    with stats_section:
+        stats_modal.load(convert_service.get_conversion_stats)
     return main_section
 
 
@@ -69,10 +129,33 @@ def __input_section():
     )
 
 
+def __reset_conversion_state(convert_service: ConvertService):
+    """
+    Reset the conversion state, cancelling the current conversion in the backend if it is not completed.
+
+    Parameters
+    ----------
+    convert_service : ConvertService
+        Service to cancel the conversion.
+    """
+
+    if st.session_state.conversion_id is not None and not st.session_state.conversion_completed:
+        try:
+            convert_service.cancel_conversion(st.session_state.conversion_id)
+            logger.info(f"Cancelled conversion ID: {st.session_state.conversion_id}")
+        except ProcessException as e:
+            logger.warning(f"Failed to cancel conversion ID {st.session_state.conversion_id}: {e}")
+    st.session_state.uploaded_file = None
+    st.session_state.conversion_started = False
+    st.session_state.conversion_completed = False
+    st.session_state.conversion_id = None
+    logger.info("Reset conversion state for new conversion")
+
+
 async def __processing_section(convert_service: ConvertService):
     """
-    Render the processing section of the app, containing the spinner and the conversion status message, and manage the
-    conversion process.
+    Render the processing section of the app, containing the spinner, the conversion status message and the cancel
+    button, and manage the conversion process.
 
     Parameters
     ----------
@@ -81,13 +164,19 @@ async def __processing_section(convert_service: ConvertService):
     """
 
     message_component = st.empty()
+    st.columns([0.8, 0.2])[1].button(
+        "Cancel conversion", use_container_width=True, on_click=__reset_conversion_state, args=(convert_service,)
+    )
     try:
-        st.session_state.conversion_id = convert_service.convert_pdf_to_images(st.session_state.uploaded_file)
-        logger.info(f"Started conversion ID: {st.session_state.conversion_id}")
+        # A rerun interrupting the polling, e.g. to handle a click, resumes polling the conversion already started
+        if st.session_state.conversion_id is None:
+            st.session_state.conversion_id = convert_service.convert_pdf_to_images(st.session_state.uploaded_file)
+            conversion_id_var.set(st.session_state.conversion_id)
+            logger.info(f"Started conversion ID: {st.session_state.conversion_id}")
         message_component.info("Conversion process started! Checking completion status... ⏳")
         while True:
             status = convert_service.check_conversion_status(st.session_state.conversion_id)
-            logger.info(f"Conversion status for ID {st.session_state.conversion_id}: {status}")
+            logger.info(f"Conversion status for ID {st.session_state.conversion_id}: {status}", extra={"sampled": True})
             if status == ConversionStatus.COMPLETED:
                 message_component.success("Conversion completed! ✅")
                 st.session_state.conversion_completed = True
@@ -95,62 +184,166 @@ async def __processing_section(convert_service: ConvertService):
             elif status == ConversionStatus.FAILED:
                 message_component.error("Conversion failed. Please try again.")
                 break
+            elif status == ConversionStatus.CANCELLED:
+                message_component.warning("Conversion cancelled.")
+                break
             else:
-                logger.info(f"Conversion status: {status}; waiting to be completed")
+                logger.info(f"Conversion status: {status}; waiting to be completed", extra={"sampled": True})
+                # Streamlit only handles a pending rerun, and so runs the callback of a clicked button such as the cancel
+                # one, when the script updates the page
+                message_component.info(f"Conversion {status.value.lower()}! Checking completion status... ⏳")
                 await asyncio.sleep(2)
     except ProcessException as e:
         logger.error(f"Failed to upload PDF: {e}")
-        message_component.error("Failed to upload PDF. Please try again.")
+        if e.status_code in (HTTPStatus.BAD_REQUEST, HTTPStatus.REQUEST_ENTITY_TOO_LARGE):
+            message_component.error(f"The PDF was rejected: {e.message}")
+        else:
+            message_component.error("Failed to upload PDF. Please try again.")
 
 
-def __output_section(convert_service: ConvertService, id: str, filename: str):
+@st.cache_data(max_entries=RESULTS_CACHE_MAX_ENTRIES, ttl=RESULTS_CACHE_TTL, show_spinner=False)
+def __get_conversion_manifest(id: str) -> T.List[T.Dict[str, T.Any]]:
     """
-    Render the output section of the app, containing the conversion results and the download button.
+    Get the manifest of the conversion results, cached across reruns since the results of a completed conversion do not
+    change.
+
+    Parameters
+    ----------
+    id : str
+        Unique identifier of the conversion.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Pages of the conversion ordered by page number.
+    """
+
+    return __get_convert_service().get_conversion_manifest(id)
+
+
+def __get_conversion_page(id: str, page: int) -> bytes:
+    """
+    Get a single image of the conversion results, cached across reruns and sessions.
 
     Parameters
     ----------
-    convert_service : ConvertService
-        Service to get the conversion results.
     id : str
         Unique identifier of the conversion.
+    page : int
+        Number of the page, starting from 1.
+
+    Returns
+    -------
+    bytes
+        Image as bytes.
+    """
+
+    page_cache = __get_page_cache()
+    image = page_cache.get((id, page))
+    if image is None:
+        image = __get_convert_service().get_conversion_page(id, page)
+        page_cache.set((id, page), image)
+    return image
+
+
+def __zip_images(id: str, page_count: int) -> bytes:
     """
+    Zip all the images of the conversion results, cached across reruns and sessions for a short time. An archive larger
+    than the cache is built again on every rerun.
 
-    @st.cache_data
-    def __zip_images(id, images):
+    Parameters
+    ----------
+    id : str
+        Unique identifier of the conversion.
+    page_count : int
+        Number of pages of the conversion.
+
+    Returns
+    -------
+    bytes
+        ZIP archive containing the images.
+    """
+
+    zip_cache = __get_zip_cache()
+    archive = zip_cache.get(id)
+    if archive is None:
         logger.info(f"Zipping images for ID: {id}")
-        return zip_images(images, IMAGE_FILENAME_FORMAT)
+        archive = zip_images([__get_conversion_page(id, page) for page in range(1, page_count + 1)], IMAGE_FILENAME_FORMAT)
+        zip_cache.set(id, archive)
+    return archive
+
+
+def __output_section(id: str, filename: str):
+    """
+    Render the output section of the app, containing the conversion results and the download button.
+
+    The results are shown a view of pages at a time, and both the pages and the ZIP archive are cached, so that reruns
+    only download the pages that were never shown before.
+
+    Parameters
+    ----------
+    id : str
+        Unique identifier of the conversion.
+    filename : str
+        Name of the converted PDF file.
+    """
 
-    images = convert_service.get_conversion_results(st.session_state.conversion_id)
+    pages = __get_conversion_manifest(id)
+    views = [pages[i : i + RESULTS_PAGES_PER_VIEW] for i in range(0, len(pages), RESULTS_PAGES_PER_VIEW)]
     col1, col2 = st.columns([0.8, 0.2])
     col1.markdown("### Conversion Results")
+    view = col1.selectbox(
+        "Pages",
+        range(len(views)),
+        format_func=lambda i: f"Pages {views[i][0]['page']}-{views[i][-1]['page']} of {len(pages)}",
+        key=f"results_view_{id}",
+        disabled=len(views) <= 1,
+    )
     with st.container(border=True):
         cols = st.columns(5)
-        for i, image_data in enumerate(images):
-            cols[i % 5].image(image_data, use_container_width=True, caption=f"Page {i+1}", output_format=IMAGE_FILE_EXTENSION)
+        for i, page in enumerate(views[view] if views else []):
+            cols[i % 5].image(
+                __get_conversion_page(id, page["page"]),
+                use_container_width=True,
+                caption=f"Page {page['page']}",
+                output_format=IMAGE_FILE_EXTENSION,
+            )
+    if st.session_state.get("zip_requested_id") != id:
+        col2.button(
+            "Prepare ZIP download",
+            use_container_width=True,
+            type="secondary",
+            on_click=lambda: st.session_state.update(zip_requested_id=id),
+        )
+    else:
+        with col2, st.spinner("Preparing ZIP..."):
+            zip_bytes = __zip_images(id, len(pages))
         col2.download_button(
             "Download Images as ZIP",
-            __zip_images(id, images),
+            zip_bytes,
             f"{filename}_images.zip",
             use_container_width=True,
             type="secondary",
         )
 
 
-def __restart_section():
+def __restart_section(convert_service: ConvertService):
     """
     Render the restart section of the app, containing the button to perform another conversion and reset the conversion
     state.
-    """
 
-    def __reset_conversion_state():
-        st.session_state.uploaded_file = None
-        st.session_state.conversion_started = False
-        st.session_state.conversion_completed = False
-        st.session_state.conversion_id = None
-        logger.info("Reset conversion state for new conversion")
+    Parameters
+    ----------
+    convert_service : ConvertService
+        Service to cancel the conversion.
+    """
 
     st.columns([0.8, 0.2])[1].button(
-        "Perform another conversion", use_container_width=True, type="primary", on_click=__reset_conversion_state
+        "Perform another conversion",
+        use_container_width=True,
+        type="primary",
+        on_click=__reset_conversion_state,
+        args=(convert_service,),
     )
 
 
@@ -158,6 +351,8 @@ def main():
     # Initialize session state variables
     if "modal_db_table_open" not in st.session_state:
         st.session_state.modal_db_table_open = False
+    if "modal_stats_open" not in st.session_state:
+        st.session_state.modal_stats_open = False
     if "conversion_id" not in st.session_state:
         st.session_state.conversion_id = None
     if "conversion_started" not in st.session_state:
@@ -165,7 +360,9 @@ def main():
     if "conversion_completed" not in st.session_state:
         st.session_state.conversion_completed = False
 
-    convert_service = ConvertService()
+    # Each run of the script logs with the conversion of its session
+    conversion_id_var.set(st.session_state.conversion_id)
+    convert_service = __get_convert_service()
     main_section = __heading_section(convert_service)
     main_section.markdown("<br>", unsafe_allow_html=True)
     with main_section:
@@ -184,8 +381,8 @@ def main():
         if st.session_state.conversion_completed:
             logger.info("Rendering output section")
             st.divider()
-            __output_section(convert_service, st.session_state.conversion_id, st.session_state.uploaded_file.name)
-            __restart_section()
+            __output_section(st.session_state.conversion_id, st.session_state.uploaded_file.name)
+            __restart_section(convert_service)
 
 
 if __name__ == "__main__":
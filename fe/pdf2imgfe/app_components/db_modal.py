@@ -1,9 +1,7 @@
 from pdf2imgfe.lib.log import logger
 
 import typing as T
-import pandas as pd
 import streamlit as st
-from streamlit_modal import Modal
 
 
 def _onclik_modal_db_table(value):
@@ -29,8 +27,6 @@ def load(get_all_conversions: T.Callable):
         Function to get all conversions from the database.
     """
 
-    db_table_modal = Modal(title="Conversions Table", max_width=800, padding=20, key="modal_db_table")
-
     if (
         st.button(
             label="🔎",
@@ -41,6 +37,12 @@ def load(get_all_conversions: T.Callable):
         or st.session_state.modal_db_table_open
     ):
         logger.info("Rendering db modal")
+        # pandas alone takes longer to import than the rest of the frontend, so it is only imported once the modal is
+        # opened, together with streamlit_modal, instead of at the startup of the frontend
+        import pandas as pd
+        from streamlit_modal import Modal
+
+        db_table_modal = Modal(title="Conversions Table", max_width=800, padding=20, key="modal_db_table")
         with db_table_modal.container():
             st.markdown("The following table shows all the conversions that have been processed.")
             with st.spinner("Retrieving data..."):
@@ -0,0 +1,103 @@
+from pdf2imgfe.lib.log import logger
+
+import typing as T
+import streamlit as st
+
+from pdf2imgfe.lib.statics import ConversionStatus, STATS_WINDOWS
+
+
+def _onclik_modal_stats(value):
+    """
+    Handle the click event on the modal.
+
+    Parameters
+    ----------
+    value : bool
+        Open or close the modal.
+    """
+
+    st.session_state.modal_stats_open = value
+
+
+def _format_duration(seconds: T.Optional[float]) -> str:
+    """
+    Format a duration for a metric.
+
+    Parameters
+    ----------
+    seconds : float, optional
+        Duration in seconds, None if there are no completed conversions.
+
+    Returns
+    -------
+    str
+        Formatted duration.
+    """
+
+    return "-" if seconds is None else f"{seconds:.1f} s"
+
+
+def load(get_conversion_stats: T.Callable):
+    """
+    Load the statistics modal.
+
+    Parameters
+    ----------
+    get_conversion_stats : Callable
+        Function to get the aggregated statistics of the conversions from the backend.
+    """
+
+    if (
+        st.button(
+            label="📊",
+            on_click=_onclik_modal_stats,
+            args=(True,),
+            help="See the statistics of the conversions",
+        )
+        or st.session_state.modal_stats_open
+    ):
+        logger.info("Rendering stats modal")
+        # Imported on the first opening of the modal, as in the database modal
+        import pandas as pd
+        from streamlit_modal import Modal
+
+        stats_modal = Modal(title="Conversions Statistics", max_width=800, padding=20, key="modal_stats")
+        with stats_modal.container():
+            window = st.selectbox("Window", list(STATS_WINDOWS), index=1, key="stats_window")
+            with st.spinner("Retrieving data..."):
+                stats = get_conversion_stats(*STATS_WINDOWS[window])
+            st.markdown("**Conversions started by status**")
+            for col, status in zip(st.columns(len(ConversionStatus)), ConversionStatus):
+                col.metric(status.value.capitalize(), stats["status_counts"].get(status.value, 0))
+            st.markdown("**Conversions finished over time**")
+            throughput = pd.DataFrame(
+                [{"start_date": b["start_date"], **b["status_counts"]} for b in stats["throughput"]],
+                columns=[
+                    "start_date",
+                    ConversionStatus.COMPLETED.value,
+                    ConversionStatus.FAILED.value,
+                    ConversionStatus.CANCELLED.value,
+                ],
+            )
+            throughput["start_date"] = pd.to_datetime(throughput["start_date"])
+            st.bar_chart(throughput.set_index("start_date").fillna(0), height=200)
+            st.markdown("**Duration of the completed conversions**")
+            for col, (percentile, seconds) in zip(
+                st.columns(len(stats["duration_percentiles"])), stats["duration_percentiles"].items()
+            ):
+                col.metric(percentile, _format_duration(seconds))
+            st.button("Ok", on_click=_onclik_modal_stats, args=(False,), type="primary", key="modal_stats_ok")
+        st.write(  # Remove default close button and set the position of the modal
+            """
+                <style>
+                    div[key="modal_stats"] button[kind="secondary"] {
+                        display: none;
+                    }
+                    div[key="modal_stats"] {
+                        left: 2rem !important;
+                        top: 1rem !important;
+                    }
+                </style>
+            """,
+            unsafe_allow_html=True,
+        )
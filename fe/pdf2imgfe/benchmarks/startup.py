@@ -0,0 +1,85 @@
+"""
+Benchmark the cold start of the frontend: the time of the first run of the Streamlit script in a fresh interpreter, with
+the heavy modules it loads, and the time of the following reruns, as triggered by every interaction of a user.
+
+The script is run through the Streamlit testing API with the environment of the .env.local file; the backend does not
+need to be running, since the script only calls it once a conversion is started or a modal is opened.
+
+Usage, from the fe folder:
+    python -m pdf2imgfe.benchmarks.startup --repeat 10
+"""
+
+import os
+from dotenv import load_dotenv
+
+dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../.env.local"))
+load_dotenv(dotenv_path, override=True)
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import typing as T
+
+APP_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Modules that the frontend does not need to import before the user opens a modal
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow")
+RUN_SCRIPT = f"""
+import sys, json, time
+sys.path.insert(0, {APP_FOLDER!r})
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({os.path.join(APP_FOLDER, "app.py")!r}, default_timeout=60)
+start = time.perf_counter()
+app.run()
+first_run = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+reruns = []
+for _ in range({{reruns}}):
+    start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{{{"first_run": first_run, "reruns": reruns, "loaded": loaded}}}}))
+"""
+
+
+def _print_latencies(name: str, latencies: T.List[float]):
+    """
+    Print the median and 95th percentile of latencies.
+
+    Parameters
+    ----------
+    name : str
+        Name of the measure.
+    latencies : List[float]
+        Latencies in seconds.
+    """
+
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(f"{name:<40} {statistics.median(latencies) * 1000:>10.0f} {p95 * 1000:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the frontend.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of fresh interpreters")
+    parser.add_argument("--reruns", type=int, default=10, help="Number of reruns in each interpreter")
+    args = parser.parse_args()
+
+    first_runs, reruns, loaded = [], [], set()
+    for _ in range(args.repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", RUN_SCRIPT.format(reruns=args.reruns)], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        first_runs.append(result["first_run"])
+        reruns.extend(result["reruns"])
+        loaded.update(result["loaded"])
+
+    print(f"\n{'Measure':<40} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    _print_latencies("first run of the script", first_runs)
+    _print_latencies("rerun of the script", reruns)
+    print(f"\nHeavy modules loaded by the first run: {', '.join(sorted(loaded)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import time
+import threading
+import typing as T
+from collections import OrderedDict
+
+
+class BytesLRUCache:
+    """
+    In-memory cache of bytes values bounded by their total size, that evicts the least recently used entries and expires
+    entries after a time to live.
+    """
+
+    _max_bytes: int
+    _ttl: float
+    _size: int
+    _entries: T.OrderedDict[T.Hashable, T.Tuple[float, bytes]]
+    _lock: threading.Lock
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: T.Hashable) -> T.Optional[bytes]:
+        """
+        Get the value cached for a key.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+
+        Returns
+        -------
+        bytes, optional
+            Cached value, or None if the key is not cached or its entry expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiration, value = entry
+            if expiration < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: T.Hashable, value: bytes):
+        """
+        Cache a value for a key, evicting the least recently used entries until the values fit in the cache. A value
+        larger than the cache is not cached.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+        value : bytes
+            Value to cache.
+        """
+
+        if len(value) > self._max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._size += len(value)
+            while self._size > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: T.Hashable):
+        """
+        Remove the entry of a key, if cached, while holding the lock.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+        """
+
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
@@ -1,11 +1,82 @@
 import os
+import json
+import queue
+import atexit
 import logging
+import itertools
+import typing as T
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
 
 from pdf2imgfe.lib.statics import EnvKey
 
-# Set up logging
+# Correlation IDs of the request sent to the backend and of the conversion of the session, copied into every record
+# logged while they are set; the request ID is also sent to the backend, so that the logs of both sides can be joined
+request_id_var: ContextVar[T.Optional[str]] = ContextVar("request_id", default=None)
+conversion_id_var: ContextVar[T.Optional[str]] = ContextVar("conversion_id", default=None)
+
+
+class _ContextFilter(logging.Filter):
+    """
+    Attach the correlation IDs of the current context to the records, before they leave the thread that logged them.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.conversion_id = conversion_id_var.get()
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    """
+    Keep only one in `sample_rate` of the records logged with `extra={"sampled": True}`, counted separately for each
+    logging call, so that high-frequency events such as status polls do not flood the logs.
+    """
+
+    def __init__(self, sample_rate: int):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.counters = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or self.sample_rate <= 1:
+            return True
+        counter = self.counters.setdefault((record.pathname, record.lineno), itertools.count())
+        record.sample_rate = self.sample_rate
+        return next(counter) % self.sample_rate == 0
+
+
+class _JsonFormatter(logging.Formatter):
+    """
+    Format the records as single-line JSON objects.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "location": f"{record.filename} {record.funcName}@{record.lineno}",
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "conversion_id": getattr(record, "conversion_id", None),
+        }
+        if hasattr(record, "sample_rate"):
+            log["sample_rate"] = record.sample_rate
+        return json.dumps(log)
+
+
+# Set up logging: the records are serialized and written by a background thread, so that logging never blocks the
+# script runs on I/O
 logger = logging.getLogger("streamlit-pdf2img")
 logger.setLevel(os.getenv(EnvKey.LOG_LEVEL_KEY))
-logging.basicConfig(
-    format=" [%(levelname)s] %(asctime)s [%(filename)s %(funcName)s@%(lineno)d]: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
-)
+logger.propagate = False
+_log_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.addFilter(_SamplingFilter(int(os.getenv(EnvKey.LOG_SAMPLE_RATE_KEY))))
+_queue_handler.addFilter(_ContextFilter())
+logger.addHandler(_queue_handler)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_JsonFormatter())
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
@@ -2,6 +2,19 @@ from enum import Enum
 
 IMAGE_FILE_EXTENSION = "PNG"
 IMAGE_FILENAME_FORMAT = "Page_{}." + IMAGE_FILE_EXTENSION
+RESULTS_PAGES_PER_VIEW = 20
+RESULTS_CACHE_MAX_ENTRIES = 500
+RESULTS_CACHE_TTL = 3600  # Seconds; a duration string would make Streamlit parse it with pandas on every rerun
+RESULTS_PAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESULTS_ZIP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESULTS_ZIP_CACHE_TTL = 300  # Seconds; the archives are large, and only downloaded once in a while
+REQUEST_ID_HEADER = "X-Request-ID"
+STATS_WINDOWS = {  # Label: (hours, bucket)
+    "Last hour": (1, "minute"),
+    "Last 24 hours": (24, "hour"),
+    "Last 7 days": (168, "hour"),
+    "Last 30 days": (720, "day"),
+}
 
 
 class EnvKey:
@@ -10,8 +23,12 @@ class EnvKey:
     """
 
     LOG_LEVEL_KEY = "LOG_LEVEL"
+    LOG_SAMPLE_RATE_KEY = "LOG_SAMPLE_RATE"
     BE_HOST_KEY = "BE_SERVICE_HOST"
     BE_PORT_KEY = "BE_APP_PORT"
+    BE_CONNECT_TIMEOUT_KEY = "BE_CONNECT_TIMEOUT"
+    BE_READ_TIMEOUT_KEY = "BE_READ_TIMEOUT"
+    BE_MAX_RETRIES_KEY = "BE_MAX_RETRIES"
 
 
 class ConversionStatus(Enum):
@@ -19,6 +36,8 @@ class ConversionStatus(Enum):
     Conversion status.
     """
 
+    QUEUED = "QUEUED"
     RUNNING = "RUNNING"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
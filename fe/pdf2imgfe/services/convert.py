@@ -1,30 +1,99 @@
-from pdf2imgfe.lib.log import logger
+from pdf2imgfe.lib.log import logger, request_id_var
 
 import os
-import base64
 import requests
 import typing as T
+from uuid import uuid4
 from http import HTTPStatus
+from datetime import datetime
+from urllib3.util.retry import Retry
+from requests.adapters import HTTPAdapter
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from pdf2imgfe.lib.exception import ProcessException
-from pdf2imgfe.lib.statics import EnvKey, ConversionStatus
+from pdf2imgfe.lib.statics import EnvKey, ConversionStatus, REQUEST_ID_HEADER
 
 
 class ConvertService:
     """
     Service to interact with the conversion API provided by the backend.
+
+    The requests share a pooled session that keeps the connections to the backend alive, are bounded by a connect and a
+    read timeout, and the idempotent ones are retried with exponential backoff on connection errors and gateway errors.
+    Each request carries a new request ID, logged on both sides to correlate them.
     """
 
+    __session: requests.Session
+    __timeout: T.Tuple[float, float]
     __APP_CONVERSION_ENDPOINT: str
-    __APP_CONVERSION_RESULTS_ENDPOINT: str
+    __APP_CONVERSION_STATUS_ENDPOINT: str
+    __APP_CONVERSION_CANCEL_ENDPOINT: str
+    __APP_CONVERSION_MANIFEST_ENDPOINT: str
+    __APP_CONVERSION_PAGE_ENDPOINT: str
     __AMS_ALL_CONVERSIONS_ENDPOINT: str
+    __AMS_STATS_ENDPOINT: str
 
     def __init__(self):
         BE_URL = f"http://{os.getenv(EnvKey.BE_HOST_KEY)}:{os.getenv(EnvKey.BE_PORT_KEY)}"
         self.__APP_CONVERSION_ENDPOINT = f"{BE_URL}/app/conversion"
-        self.__APP_CONVERSION_RESULTS_ENDPOINT = f"{BE_URL}/app/conversion/results"
+        self.__APP_CONVERSION_STATUS_ENDPOINT = f"{BE_URL}/app/conversion/status"
+        self.__APP_CONVERSION_CANCEL_ENDPOINT = f"{BE_URL}/app/conversion/cancel"
+        self.__APP_CONVERSION_MANIFEST_ENDPOINT = f"{BE_URL}/app/conversion/manifest"
+        self.__APP_CONVERSION_PAGE_ENDPOINT = f"{BE_URL}/app/conversion/page"
         self.__AMS_ALL_CONVERSIONS_ENDPOINT = f"{BE_URL}/ams/conversion-table"
+        self.__AMS_STATS_ENDPOINT = f"{BE_URL}/ams/stats"
+        self.__timeout = (float(os.getenv(EnvKey.BE_CONNECT_TIMEOUT_KEY)), float(os.getenv(EnvKey.BE_READ_TIMEOUT_KEY)))
+        retry = Retry(
+            total=int(os.getenv(EnvKey.BE_MAX_RETRIES_KEY)),
+            backoff_factor=0.5,
+            status_forcelist=[HTTPStatus.BAD_GATEWAY, HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.GATEWAY_TIMEOUT],
+            allowed_methods=["GET", "HEAD"],
+            raise_on_status=False,
+        )
+        self.__session = requests.Session()
+        self.__session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=retry))
+
+    def __request(self, method: str, url: str, error_message: str, sampled: bool = False, **kwargs) -> requests.Response:
+        """
+        Send a request to the backend through the pooled session.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request.
+        url : str
+            URL of the request.
+        error_message : str
+            Message of the exception raised if the backend cannot be reached.
+        sampled : bool
+            Whether the request is a high-frequency one, such as a status poll, whose logs are sampled.
+        **kwargs
+            Additional arguments of the request.
+
+        Returns
+        -------
+        requests.Response
+            Response of the backend.
+
+        Raises
+        ------
+        ProcessException
+            If the backend cannot be reached or does not answer within the timeout
+        """
+
+        request_id = uuid4().hex
+        request_id_token = request_id_var.set(request_id)
+        try:
+            response = self.__session.request(
+                method, url, timeout=self.__timeout, headers={REQUEST_ID_HEADER: request_id}, **kwargs
+            )
+            logger.info(f"Response: {response.status_code}, {response}", extra={"sampled": sampled})
+            return response
+        except requests.RequestException as e:
+            logger.error(f"Request to {url} failed: {e}")
+            raise ProcessException(error_message, HTTPStatus.SERVICE_UNAVAILABLE)
+        finally:
+            request_id_var.reset(request_id_token)
 
     def convert_pdf_to_images(self, pdf_file: UploadedFile) -> str:
         """
@@ -43,16 +112,17 @@ class ConvertService:
         Raises
         ------
         ProcessException
-            If failed to upload PDF for conversion
+            If failed to upload PDF for conversion, or if the PDF was rejected by the backend
         """
 
         logger.info("Requesting PDF conversion")
         files = {"pdf_file": (pdf_file.name, pdf_file.getvalue(), pdf_file.type)}
-        response = requests.post(self.__APP_CONVERSION_ENDPOINT, files=files)
-        logger.info(f"Response: {response.status_code}, {response}")
+        response = self.__request("POST", self.__APP_CONVERSION_ENDPOINT, "Failed to upload PDF for conversion", files=files)
         if response.status_code == HTTPStatus.OK:
             id = response.json().get("id")
             return id
+        elif response.status_code in (HTTPStatus.BAD_REQUEST, HTTPStatus.REQUEST_ENTITY_TOO_LARGE):
+            raise ProcessException(response.json().get("detail"), response.status_code)
         else:
             raise ProcessException("Failed to upload PDF for conversion", response.status_code)
 
@@ -76,18 +146,73 @@ class ConvertService:
             If failed to check conversion status
         """
 
-        logger.info("Requesting conversion status")
-        response = requests.get(self.__APP_CONVERSION_ENDPOINT, params={"id": id})
-        logger.info(f"Response: {response.status_code}, {response}")
+        logger.info("Requesting conversion status", extra={"sampled": True})
+        response = self.__request(
+            "GET", self.__APP_CONVERSION_ENDPOINT, "Failed to check conversion status", sampled=True, params={"id": id}
+        )
         if response.status_code == HTTPStatus.OK:
             status = response.json().get("status")
             return ConversionStatus(status)
         else:
             raise ProcessException("Failed to check conversion status", response.status_code)
 
-    def get_conversion_results(self, id: str) -> T.List[bytes]:
+    def check_conversions_status(
+        self, ids: T.List[str], changed_since: T.Optional[datetime] = None
+    ) -> T.Dict[str, ConversionStatus]:
+        """
+        Check the status of many conversions with a single request.
+
+        Parameters
+        ----------
+        ids : List[str]
+            IDs of the conversions.
+        changed_since : datetime, optional
+            If provided, only the conversions updated after this date are returned.
+
+        Returns
+        -------
+        Dict[str, ConversionStatus]
+            Status of each conversion found, by ID
+
+        Raises
+        ------
+        ProcessException
+            If failed to check conversions status
+        """
+
+        logger.info("Requesting conversions status", extra={"sampled": True})
+        payload = {"ids": ids, "changed_since": changed_since.isoformat() if changed_since else None}
+        response = self.__request(
+            "POST", self.__APP_CONVERSION_STATUS_ENDPOINT, "Failed to check conversions status", sampled=True, json=payload
+        )
+        if response.status_code == HTTPStatus.OK:
+            return {c.get("id"): ConversionStatus(c.get("status")) for c in response.json()}
+        else:
+            raise ProcessException("Failed to check conversions status", response.status_code)
+
+    def cancel_conversion(self, id: str):
         """
-        Get the conversion results.
+        Cancel a queued or running conversion.
+
+        Parameters
+        ----------
+        id : str
+            ID of the conversion.
+
+        Raises
+        ------
+        ProcessException
+            If failed to cancel the conversion
+        """
+
+        logger.info("Requesting conversion cancellation")
+        response = self.__request("POST", self.__APP_CONVERSION_CANCEL_ENDPOINT, "Failed to cancel conversion", params={"id": id})
+        if response.status_code != HTTPStatus.OK:
+            raise ProcessException("Failed to cancel conversion", response.status_code)
+
+    def get_conversion_manifest(self, id: str) -> T.List[T.Dict[str, T.Any]]:
+        """
+        Get the manifest of the conversion results, describing each page without downloading it.
 
         Parameters
         ----------
@@ -96,24 +221,54 @@ class ConvertService:
 
         Returns
         -------
-        List[bytes]
-            Images as bytes
+        List[Dict[str, Any]]
+            Pages of the conversion ordered by page number
 
         Raises
         ------
         ProcessException
-            If failed to get conversion results
+            If failed to get the conversion manifest
         """
 
-        logger.info("Requesting conversion results")
-        response = requests.get(self.__APP_CONVERSION_RESULTS_ENDPOINT, params={"id": id})
-        logger.info(f"Response: {response.status_code}, {response}")
+        logger.info("Requesting conversion manifest")
+        response = self.__request(
+            "GET", self.__APP_CONVERSION_MANIFEST_ENDPOINT, "Failed to get conversion manifest", params={"id": id}
+        )
         if response.status_code == HTTPStatus.OK:
-            images_bytes = response.json().get("images_bytes")
-            images = [base64.b64decode(i) for i in images_bytes]
-            return images
+            return response.json().get("pages")
         else:
-            raise ProcessException("Failed to get conversion results", response.status_code)
+            raise ProcessException("Failed to get conversion manifest", response.status_code)
+
+    def get_conversion_page(self, id: str, page: int) -> bytes:
+        """
+        Get a single image of the conversion results.
+
+        Parameters
+        ----------
+        id : str
+            ID of the conversion.
+        page : int
+            Number of the page, starting from 1.
+
+        Returns
+        -------
+        bytes
+            Image as bytes
+
+        Raises
+        ------
+        ProcessException
+            If failed to get the conversion page
+        """
+
+        logger.info(f"Requesting conversion page {page}")
+        response = self.__request(
+            "GET", self.__APP_CONVERSION_PAGE_ENDPOINT, "Failed to get conversion page", params={"id": id, "page": page}
+        )
+        if response.status_code == HTTPStatus.OK:
+            return response.content
+        else:
+            raise ProcessException("Failed to get conversion page", response.status_code)
 
     def get_all_conversions(self) -> T.List[T.Dict[str, str]]:
         """
@@ -131,9 +286,39 @@ class ConvertService:
         """
 
         logger.info("Requesting all conversions")
-        response = requests.get(self.__AMS_ALL_CONVERSIONS_ENDPOINT)
-        logger.info(f"Response: {response.status_code}, {response}")
+        response = self.__request("GET", self.__AMS_ALL_CONVERSIONS_ENDPOINT, "Failed to get conversion table")
         if response.status_code == HTTPStatus.OK:
             return response.json()
         else:
             raise ProcessException("Failed to get conversion table", response.status_code)
+
+    def get_conversion_stats(self, hours: int, bucket: str) -> T.Dict[str, T.Any]:
+        """
+        Get the aggregated statistics of the conversions of the last hours.
+
+        Parameters
+        ----------
+        hours : int
+            Number of hours of the window of the statistics.
+        bucket : str
+            Time bucket of the throughput: minute, hour or day.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Counts by status, throughput per bucket and percentiles of the duration of the conversions
+
+        Raises
+        ------
+        ProcessException
+            If failed to get the statistics
+        """
+
+        logger.info("Requesting conversion stats")
+        response = self.__request(
+            "GET", self.__AMS_STATS_ENDPOINT, "Failed to get conversion stats", params={"hours": hours, "bucket": bucket}
+        )
+        if response.status_code == HTTPStatus.OK:
+            return response.json()
+        else:
+            raise ProcessException("Failed to get conversion stats", response.status_code)